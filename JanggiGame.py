@@ -2,45 +2,193 @@
 # Date: 3/11/2021
 # Description:
 
+import copy
+import random
+from array import array
+from collections import OrderedDict
+
+
+# column labels for algebraic notation
+COL_LABELS = 'abcdefghi'
+
+# spaces are stored internally as square indices from 0 to 89 - the index of a space is
+# row * 9 + column, so a1 is 0, i1 is 8, a2 is 9 and i10 is 89
+SPACE_NAMES = tuple(COL_LABELS[square % 9] + str(square // 9 + 1) for square in range(90))
+SPACE_INDEX = {name: square for square, name in enumerate(SPACE_NAMES)}
+
+# the four directions along the columns and rows
+ORTHOGONAL = (1, 0), (-1, 0), (0, -1), (0, 1)
+
+# square indices of the spaces in each palace
+RED_PALACE = tuple(row * 9 + col for row in (0, 1, 2) for col in (3, 4, 5))
+BLUE_PALACE = tuple(row * 9 + col for row in (7, 8, 9) for col in (3, 4, 5))
+
+# True for each square index that is inside either palace
+IN_PALACE = tuple(square in RED_PALACE or square in BLUE_PALACE for square in range(90))
+
+
+def build_rays():
+    """
+    creates the neighbor tables used for move generation - for every movement direction used by
+    any piece, each square index is mapped to the squares reached by repeating that movement
+    until leaving the board
+    :return: dictionary mapping a (column, row) movement to a tuple with an entry for each square
+    """
+    directions = [(1, 0), (-1, 0), (0, -1), (0, 1),
+                  (1, 1), (1, -1), (-1, 1), (-1, -1),
+                  (-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1),
+                  (-3, -2), (-3, 2), (-2, -3), (-2, 3), (2, -3), (2, 3), (3, -2), (3, 2)]
+    rays = {}
+    for x, y in directions:
+        table = []
+        for square in range(90):
+            col = square % 9 + x
+            row = square // 9 + y
+            ray = []
+            while 0 <= col < 9 and 0 <= row < 10:
+                ray.append(row * 9 + col)
+                col += x
+                row += y
+            table.append(tuple(ray))
+        rays[(x, y)] = tuple(table)
+    return rays
+
+
+RAYS = build_rays()
+
+
+class PieceType:
+    """
+    PieceType class contains the information shared by every piece of one type, such as the name,
+    symbol and movement rules. There is a single PieceType object for each type, so types are
+    compared by identity, and it cannot be changed once created.
+    """
+    __slots__ = ('_code', '_name', '_symbol', '_directions', '_movement', '_confined',
+                 '_palace_movement')
+
+    def __init__(self, code, name, symbol, directions, movement=1, confined=False,
+                 palace_movement=True, blue_directions=None):
+        """
+        init method sets the information of the type
+        :param code: small integer identifying the type, the index in PIECE_TYPES
+        :param name: name of the piece, e.g. 'Cannon'
+        :param symbol: symbol to display on the board for red, blue uses the uppercase symbol
+        :param directions: movement directions as (column, row) tuples
+        :param movement: optional, number of spaces/ times the piece can move in one direction,
+                         -1 for any number
+        :param confined: optional, True if the piece is confined to the palace
+        :param palace_movement: optional, True if the piece can move along diagonals in palace
+        :param blue_directions: optional, the movement directions of blue's pieces if they are
+                                different from red's
+        """
+        if blue_directions is None:
+            blue_directions = directions
+        # red's directions first so they can be indexed by the player boolean
+        for slot, value in zip(self.__slots__, (code, name, symbol, (directions, blue_directions),
+                                                movement, confined, palace_movement)):
+            object.__setattr__(self, slot, value)
+
+
+    def __setattr__(self, name, value):
+        """piece types are shared by every piece, so they cannot be changed"""
+        raise AttributeError('PieceType objects cannot be changed')
+
+
+    def __repr__(self):
+        """returns the name of the type"""
+        return self._name
+
+
+    def get_code(self):
+        """returns the integer identifying the type"""
+        return self._code
+
+
+    def get_name(self):
+        """returns the name of the piece"""
+        return self._name
+
+
+    def get_symbol(self, player):
+        """
+        returns the symbol of the piece to print on the board
+        uppercase for blue, lowercase for red
+        """
+        if player:
+            return self._symbol.upper()
+        return self._symbol
+
+
+    def get_legal_moves(self, player):
+        """returns information about the legal movements of a given player's pieces"""
+        return self._directions[player], self._movement, self._confined, self._palace_movement
+
+
+# the type of each piece - the general uses k for king since it shares g with guard, and the
+# chariot uses r for rook since it shares c with cannon
+GENERAL = PieceType(0, 'General', 'k', ORTHOGONAL, confined=True)
+GUARD = PieceType(1, 'Guard', 'g', ORTHOGONAL, confined=True)
+# the L shaped movements, unaffected by diagonals in palace
+HORSE = PieceType(2, 'Horse', 'h', ((-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                                    (1, -2), (1, 2), (2, -1), (2, 1)), palace_movement=False)
+# the large L shaped movements, unaffected by diagonals in palace
+ELEPHANT = PieceType(3, 'Elephant', 'e', ((-3, -2), (-3, 2), (-2, -3), (-2, 3),
+                                          (2, -3), (2, 3), (3, -2), (3, 2)), palace_movement=False)
+# chariots and cannons can move any number of spaces
+CHARIOT = PieceType(4, 'Chariot', 'r', ORTHOGONAL, movement=-1)
+CANNON = PieceType(5, 'Cannon', 'c', ORTHOGONAL, movement=-1)
+# soldiers move forward or sideways, and forward depends on the player
+SOLDIER = PieceType(6, 'Soldier', 's', ((-1, 0), (1, 0), (0, 1)),
+                    blue_directions=((-1, 0), (1, 0), (0, -1)))
+
+# piece types indexed by code
+PIECE_TYPES = (GENERAL, GUARD, HORSE, ELEPHANT, CHARIOT, CANNON, SOLDIER)
+
 
 class Piece:
     """
-    Piece class contains information about each piece including player, position on board, name, and
-    other piece specific rules such as palace confinement or movement direction. Inherited by other
-    piece specific classes.
+    Piece class contains information about each piece including player, position on board, and
+    its PieceType, which holds the name and movement rules shared by every piece of the type.
+    Inherited by other piece specific classes, which each set the type. Only the player and
+    position are stored in each piece.
     """
+    __slots__ = ('_player', '_square')
+
+    # the PieceType of every piece of the class
+    _type = None
 
     def __init__(self, player, position):
         """
-        init method for generic piece - piece specific classes that inherit this one fill in more
-        specific information
+        init method for generic piece
         :param player: True for blue, False for red
-        :param position: position on the board as a string in algebraic notation, e.g. 'a1'
+        :param position: position on the board as a string in algebraic notation, e.g. 'a1', or
+                         as a square index
         """
         self._player = player
-        self._position = position
-        # name of piece
-        self._name = ''
-        # symbol to display on board
-        self._symbol = 'p'
-        # movement directions
-        self._directions = None
-        # number of spaces/ times the piece can move in one direction
-        self._movement = 1
-        # True if piece is confined to palace
-        self._confined = False
-        # True if piece can move along diagonals in palace
-        self._palace_movement = True
+        # position is stored as a square index
+        if isinstance(position, str):
+            position = SPACE_INDEX[position]
+        self._square = position
 
 
     def __str__(self):
         """prints the name of the piece"""
-        return self._name
+        return self._type.get_name()
+
+
+    def get_type(self):
+        """returns the PieceType of the piece"""
+        return self._type
+
+
+    def copy(self):
+        """returns a new piece of the same class for the same player on the same square"""
+        return type(self)(self._player, self._square)
 
 
     def get_name(self):
         """returns the name of the piece"""
-        return self._name
+        return self._type.get_name()
 
 
     def get_player(self):
@@ -53,183 +201,435 @@ class Piece:
         returns the symbol of the piece to print on the board
         uppercase for blue, lowercase for red
         """
-        if self._player:
-            return self._symbol.upper()
-        return self._symbol
+        return self._type.get_symbol(self._player)
 
 
     def get_space(self):
         """returns the position on the board in algebraic notation"""
-        return self._position
+        return SPACE_NAMES[self._square]
+
+
+    def get_square(self):
+        """returns the position on the board as a square index"""
+        return self._square
 
 
     def get_coords(self):
         """returns the position on th board in column, row coordinates"""
-        col = self._position[0]
-        row = self._position[1:]
-        return ord(col) - 97, int(row) - 1
+        return self._square % 9, self._square // 9
 
 
     def set_space(self, new_position):
-        """updates the position data member with a new space"""
-        self._position = new_position
+        """updates the position data member with a new space in algebraic notation"""
+        self._square = SPACE_INDEX[new_position]
+
+
+    def set_square(self, new_square):
+        """updates the position data member with a new square index"""
+        self._square = new_square
 
 
     def get_legal_moves(self):
         """returns information about the piece's legal movements"""
-        return self._directions, self._movement, \
-               self._confined, self._palace_movement
+        return self._type.get_legal_moves(self._player)
 
 
 class General(Piece):
     """
     General class inherits Piece class methods and data members and
-    contains piece specific information, such as symbol for display and
-    legal moves.
+    uses the General piece type.
     """
-
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'General'
-        # k for king since general shares g with guard
-        self._symbol = 'k'
-        # can move any cardinal direction
-        self._directions = (1, 0), (-1, 0), (0, -1), (0, 1)
-        # confined to palace
-        self._confined = True
-
+    __slots__ = ()
+    _type = GENERAL
 
 
 class Guard(Piece):
     """
     Guard class inherits Piece class methods and data members and
-    contains piece specific information, such as symbol for display and
-    legal moves.
+    uses the Guard piece type.
     """
-
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'Guard'
-        self._symbol = 'g'
-        # can move any cardinal direction
-        self._directions = (1, 0), (-1, 0), (0, -1), (0, 1)
-        # confined to palace
-        self._confined = True
-
-
+    __slots__ = ()
+    _type = GUARD
 
 
 class Horse(Piece):
     """
     Horse class inherits Piece class methods and data members and
-    contains piece specific information, such as symbol for display and
-    legal moves.
+    uses the Horse piece type.
     """
+    __slots__ = ()
+    _type = HORSE
 
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'Horse'
-        self._symbol = 'h'
-        # the L shaped movements
-        self._directions = (-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)
-        # unaffected by diagonals in palace
-        self._palace_movement = False
+
+class Elephant(Piece):
+    """
+    Elephant class inherits Piece class methods and data members and
+    uses the Elephant piece type.
+    """
+    __slots__ = ()
+    _type = ELEPHANT
 
 
+class Chariot(Piece):
+    """
+    Chariot class inherits Piece class methods and data members and
+    uses the Chariot piece type.
+    """
+    __slots__ = ()
+    _type = CHARIOT
 
 
-class Elephant(Piece):
+class Cannon(Piece):
     """
-    Elephant class inherits Piece class methods and data members and
-    contains piece specific information, such as symbol for display and
-    legal moves.
+    Cannon class inherits Piece class methods and data members and
+    uses the Cannon piece type.
     """
+    __slots__ = ()
+    _type = CANNON
 
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'Elephant'
-        self._symbol = 'e'
-        # the large L shaped movement
-        self._directions = (-3, -2), (-3, 2), (-2, -3), (-2, 3), (2, -3), (2, 3), (3, -2), (3, 2)
-        # unaffected by diagonals in palace
-        self._palace_movement = False
+
+class Soldier(Piece):
+    """
+    Soldier class inherits Piece class methods and data members and
+    uses the Soldier piece type.
+    """
+    __slots__ = ()
+    _type = SOLDIER
 
 
+# piece classes keyed by the lowercase symbol used in board setups
+PIECE_CLASSES = {piece_class._type.get_symbol(False): piece_class
+                 for piece_class in (General, Guard, Horse, Elephant, Chariot, Cannon, Soldier)}
 
-class Chariot(Piece):
+# pieces are stored in a single byte as the code of their type plus one, plus 8 for blue, so red
+# pieces are 1 to 7, blue pieces 9 to 15 and an empty square is 0 - the piece class and player of
+# each byte value, or None for values that are not pieces
+SQUARE_CODES = tuple((PIECE_CLASSES[PIECE_TYPES[value % 8 - 1].get_symbol(False)], value >= 8)
+                     if value % 8 else None for value in range(16))
+# the byte of each symbol used in board setups
+SYMBOL_CODES = {piece_type.get_symbol(player): piece_type.get_code() + 1 + 8 * player
+                for piece_type in PIECE_TYPES for player in (False, True)}
+
+# game states in the order they are numbered in the compact form of a game
+GAME_STATES = ('UNFINISHED', 'RED_WON', 'BLUE_WON')
+
+# the compact form of a game is a format byte, a byte with the turn in the lowest bit and the game
+# state in the next two bits, and then a byte for each square index
+POSITION_FORMAT = 1
+POSITION_SIZE = 92
+
+# a move as a single integer, square from * 90 + square to, with passing given a code of its own
+# since the general's square twice depends on where the general is - lists of moves are kept in
+# arrays of MOVE_TYPECODE, which holds every code in two bytes
+PASS_MOVE = 90 * 90
+MOVE_TYPECODE = 'H'
+
+
+
+def build_palace_diagonals():
     """
-    Chariot class inherits Piece class methods and data members and
-    contains piece specific information, such as symbol for display and
-    legal moves.
+    creates the table of palace diagonal lines that chariots and cannons can follow
+    :return: tuple with an entry for each square index, each entry being a tuple of rays where
+             each ray is a tuple of the squares along a palace diagonal leaving that square
     """
+    table = []
+    for square in range(90):
+        rays = []
+        if square in PALACE_CONNECTIONS:
+            for x, y in (1, 1), (1, -1), (-1, 1), (-1, -1):
+                ray = []
+                pos = square
+                # follow the diagonal for as long as the line continues
+                for next_pos in RAYS[(x, y)][square]:
+                    if next_pos not in PALACE_CONNECTIONS[pos]:
+                        break
+                    ray.append(next_pos)
+                    pos = next_pos
+                if ray:
+                    rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return tuple(table)
+
+
+def build_step_moves(piece_type, player):
+    """
+    creates the move table of a piece that moves a single step, e.g. the horse - the movement
+    information is taken from the piece type so the table always matches the piece
+    :param piece_type: the PieceType of the piece, e.g. HORSE
+    :param player: True for blue, False for red
+    :return: tuple with an entry for each square index, each entry being a tuple of
+             (destination, legs) pairs where legs is a tuple of the squares that must be empty for
+             the movement to not be blocked
+    """
+    direct, moves, confined, pal_move = piece_type.get_legal_moves(player)
+    table = []
+    for square in range(90):
+        piece_x, piece_y = square % 9, square // 9
+        destinations = []
 
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'Chariot'
-        # r for rook since chariot shares c with cannon
-        self._symbol = 'r'
-        # can move any cardinal direction
-        self._directions = (1, 0), (-1, 0), (0, -1), (0, 1)
-        # can move any number of spaces
-        self._movement = -1
+        for x, y in direct:
+            pos_x = piece_x + x
+            pos_y = piece_y + y
+            if not (0 <= pos_x < 9 and 0 <= pos_y < 10):
+                continue
+            destination = pos_y * 9 + pos_x
+
+            # pieces confined to the palace cannot leave it
+            if confined and not IN_PALACE[destination]:
+                continue
+
+            # the spaces incrementally closer to the starting position block the movement, which
+            # only applies to the horse and elephant
+            legs = []
+            while x != 0 and y != 0:
+                if x > 0:
+                    x -= 1
+                else:
+                    x += 1
+                if y > 0:
+                    y -= 1
+                else:
+                    y += 1
+                legs.append(square + y * 9 + x)
+
+            destinations.append((destination, tuple(legs)))
+
+        # movement along palace diagonals combines movement vectors to ensure movement is in
+        # legal direction (mostly for soldier pieces)
+        if pal_move and square in PALACE_CONNECTIONS:
+            for x1, y1 in direct[0:2]:
+                for x2, y2 in direct[2:]:
+                    ray = RAYS[(x1 + x2, y1 + y2)][square]
+                    if ray and ray[0] in PALACE_CONNECTIONS[square]:
+                        destinations.append((ray[0], ()))
+
+        table.append(tuple(destinations))
+    return tuple(table)
+
+
+# diagonal lines inside each palace, stored by square index
+PALACE_CONNECTIONS = {SPACE_INDEX[space]: tuple(SPACE_INDEX[other] for other in others)
+                      for space, others in {'d1': ['e2'],
+                                            'f1': ['e2'],
+                                            'e2': ['d1', 'f1', 'd3', 'f3'],
+                                            'd3': ['e2'],
+                                            'f3': ['e2'],
+                                            'd8': ['e9'],
+                                            'f8': ['e9'],
+                                            'e9': ['d8', 'f8', 'd10', 'f10'],
+                                            'd10': ['e9'],
+                                            'f10': ['e9']}.items()}
+
+# palace diagonal lines leaving each square index
+PALACE_DIAGONALS = build_palace_diagonals()
+
+# lines that chariots and cannons move along from each square index - the four directions along
+# the columns and rows followed by any palace diagonals
+SLIDER_RAYS = tuple(tuple(RAYS[direction][square] for direction in ORTHOGONAL) + palace_rays
+                    for square, palace_rays in enumerate(PALACE_DIAGONALS))
+
+# move tables for every piece that moves a single step, keyed by PieceType, with index 0 for red
+# and 1 for blue
+STEP_MOVES = {piece_type: (build_step_moves(piece_type, False), build_step_moves(piece_type, True))
+              for piece_type in (GENERAL, GUARD, HORSE, ELEPHANT, SOLDIER)}
+
+
+def build_step_attackers(player):
+    """
+    reverses the step move tables of a player so that attacks can be found working outward from
+    the attacked square
+    :param player: True for blue, False for red
+    :return: tuple with an entry for each square index, each entry being a tuple of
+             (square, PieceType, legs) for every square a piece of that type could attack it from
+             when the legs are empty
+    """
+    table = [[] for square in range(90)]
+    for piece_type, moves in STEP_MOVES.items():
+        for square, destinations in enumerate(moves[player]):
+            for destination, legs in destinations:
+                table[destination].append((square, piece_type, legs))
+    return tuple(tuple(attackers) for attackers in table)
 
 
+# step pieces that can attack each square index, index 0 for red pieces and 1 for blue pieces
+STEP_ATTACKERS = (build_step_attackers(False), build_step_attackers(True))
 
-class Cannon(Piece):
+
+def build_line_table(length):
     """
-    Cannon class inherits Piece class methods and data members and
-    contains piece specific information, such as symbol for display and
-    legal moves.
+    creates the sliding table used by the BitBoard for one row or column - for every position on
+    the line and every occupancy pattern of the line, gives the squares a chariot reaches and the
+    screens and squares a cannon jumps to
+    :param length: number of squares in the line, 9 for a row and 10 for a column
+    :return: tuple indexed by position then by occupancy bit pattern, each entry being a tuple of
+             the chariot bit mask and a tuple of (screen bit, jump bit mask) pairs for the cannon
+    """
+    table = []
+    for pos in range(length):
+        entries = []
+        for occupancy in range(1 << length):
+            slide = 0
+            jumps = []
+            for step in (1, -1):
+                i = pos + step
+
+                # chariot reaches every space up to and including the first piece
+                while 0 <= i < length:
+                    slide |= 1 << i
+                    if occupancy >> i & 1:
+                        break
+                    i += step
+
+                # the first piece is the cannon screen, and the cannon reaches every space after it
+                # up to and including the next piece
+                if 0 <= i < length:
+                    screen = 1 << i
+                    jump = 0
+                    i += step
+                    while 0 <= i < length:
+                        jump |= 1 << i
+                        if occupancy >> i & 1:
+                            break
+                        i += step
+                    if jump:
+                        jumps.append((screen, jump))
+
+            entries.append((slide, tuple(jumps)))
+        table.append(tuple(entries))
+    return tuple(table)
+
+
+def build_column_spread():
     """
+    creates the table used to turn a bit mask of rows within a column into a board bit mask
+    :return: tuple indexed by column then by row bit mask, each entry being a board bit mask
+    """
+    table = []
+    for col in range(9):
+        masks = []
+        for rows in range(1 << 10):
+            mask = 0
+            for row in range(10):
+                if rows >> row & 1:
+                    mask |= 1 << (row * 9 + col)
+            masks.append(mask)
+        table.append(tuple(masks))
+    return tuple(table)
+
+
+def mask_to_squares(mask):
+    """
+    converts a board bit mask to a list of square indices
+    :param mask: integer with bit n set for each square index n
+    :return: list of square indices
+    """
+    squares = []
+    while mask:
+        low = mask & -mask
+        squares.append(low.bit_length() - 1)
+        mask ^= low
+    return squares
 
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'Cannon'
-        self._symbol = 'c'
-        # can move any cardinal direction
-        self._directions = (1, 0), (-1, 0), (0, -1), (0, 1)
-        # can move any number of spaces
-        self._movement = -1
 
+# sliding tables for the BitBoard, indexed by column for rows and by row for columns
+ROW_LINES = build_line_table(9)
+COLUMN_LINES = build_line_table(10)
+COLUMN_SPREAD = build_column_spread()
 
 
-class Soldier(Piece):
+def build_zobrist_keys():
     """
-    Soldier class inherits Piece class methods and data members and
-    contains piece specific information, such as symbol for display and
-    legal moves.
+    creates the random keys used for Zobrist hashing - a position is identified by combining the
+    key of each piece on its square and the key for blue to move with exclusive or, so a move
+    only changes the keys of the squares it touches
+    :return: tuple containing a dictionary keyed by PieceType that maps to the keys of red and
+             blue, each with a key for each square index, and the key for blue to move
     """
+    # fixed seed so a position has the same key every time the program runs
+    rng = random.Random(20210311)
+    piece_keys = {}
+    for piece_type in PIECE_TYPES:
+        blue = tuple(rng.getrandbits(64) for square in range(90))
+        red = tuple(rng.getrandbits(64) for square in range(90))
+        piece_keys[piece_type] = red, blue
+    return piece_keys, rng.getrandbits(64)
+
+
+# 64 bit Zobrist keys keyed by PieceType, index 0 for red and 1 for blue, and the key for blue
+# to move
+ZOBRIST_PIECES, ZOBRIST_BLUE_TURN = build_zobrist_keys()
+
+
+# value of each piece type, the general is never captured so it has no value
+PIECE_VALUES = {GENERAL: 0,
+                CHARIOT: 1300,
+                CANNON: 700,
+                HORSE: 500,
+                ELEPHANT: 300,
+                GUARD: 300,
+                SOLDIER: 200}
+
+# value of each piece inside the other player's palace, where it threatens the general - guards
+# and generals never leave their own palace
+PALACE_ATTACK_VALUES = {CHARIOT: 40,
+                        CANNON: 30,
+                        HORSE: 30,
+                        ELEPHANT: 20,
+                        SOLDIER: 10}
+
+
+def build_piece_square_values():
+    """
+    creates the default piece-square tables, seen from blue's side of the board - soldiers gain
+    for each row they have advanced and more inside the other palace, and horses lose on the edge
+    columns where they reach fewer spaces
+    :return: dictionary mapping PieceType to a list of 90 values by square index
+    """
+    soldier = []
+    horse = []
+    for square in range(90):
+        row = square // 9
+        col = square % 9
+        value = max(0, 6 - row) * 10
+        if square in RED_PALACE:
+            value += 20
+        soldier.append(value)
+        horse.append(-10 if col in (0, 8) else 0)
+    return {SOLDIER: soldier, HORSE: horse}
+
+
+# piece-square values of blue pieces, red pieces use the same tables with the rows reversed
+PIECE_SQUARE_VALUES = build_piece_square_values()
 
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'Soldier'
-        self._symbol = 's'
-        # movement direction is dependent on player
-        if self._player:
-            self._directions = (-1, 0), (1, 0), (0, -1)
-        else:
-            self._directions = (-1, 0), (1, 0), (0, 1)
+
+def build_evaluation_tables():
+    """
+    creates the values the board adds up for each piece as it is placed, moved and captured -
+    every value is from blue's side, so the values of red pieces are negative
+    :return: dictionary mapping PieceType to a tuple of red's and blue's entries, each a tuple
+             containing the material value and the piece-square and palace attack values by
+             square index
+    """
+    tables = {}
+    for piece_type in PIECE_TYPES:
+        entries = []
+        for player, sign, palace in (False, -1, BLUE_PALACE), (True, 1, RED_PALACE):
+            piece_square = PIECE_SQUARE_VALUES.get(piece_type, [0] * 90)
+            if not player:
+                # red sees the board with the rows reversed
+                piece_square = [piece_square[(9 - square // 9) * 9 + square % 9]
+                                for square in range(90)]
+            attack = PALACE_ATTACK_VALUES.get(piece_type, 0)
+            entries.append((sign * PIECE_VALUES[piece_type],
+                            tuple(sign * value for value in piece_square),
+                            tuple(sign * attack if square in palace else 0
+                                  for square in range(90))))
+        tables[piece_type] = tuple(entries)
+    return tables
+
+
+# evaluation values of each piece type, index 0 for red and 1 for blue, see Board.get_terms
+EVALUATION_TABLES = build_evaluation_tables()
 
 
 class Board:
@@ -242,19 +642,36 @@ class Board:
 
     def __init__(self, setup=None):
         """
-        init method creates a list of lists representing the board and calls method to set up
+        init method creates a list representing the board and calls method to set up
         pieces in a given layout or the default starting layout
         :param setup: optional, used to set up a board with the given setup, mostly used for testing
+                      - an empty list gives an empty board
         """
 
         # column labels for algebraic notation
-        self._col_labels = 'abcdefghi'
-        # board is represented as 9 lists (representing columns)
-        # with 10 elements each (representing columns)
-        self._spaces = []
-        for col in range(0, 9):
-            new_col = [None] * 10
-            self._spaces.append(new_col)
+        self._col_labels = COL_LABELS
+        # board is represented as a single list of 90 spaces indexed by square index
+        # (row * 9 + column), see SPACE_NAMES
+        self._spaces = [None] * 90
+        # stack of moves made with push_move, each entry is the moved piece, the captured piece
+        # and the square the piece moved from so the move can be undone with pop_move
+        self._history = []
+        # optional AttackMap that is kept up to date as pieces are placed and moved
+        self._attack_map = None
+        # Zobrist hash of the pieces on the board, see ZOBRIST_PIECES
+        self._key = 0
+        # pieces on the board of each player and each player's general, index 0 for red and 1 for
+        # blue, updated as pieces are placed, moved and captured
+        self._pieces = [[], []]
+        self._generals = [None, None]
+        # evaluation terms of the pieces on the board from blue's side, updated as pieces are
+        # placed, moved and captured, see get_terms
+        self._material = 0
+        self._piece_square = 0
+        self._palace_attack = 0
+        # True while the pieces and everything kept about them are shared with a copy-on-write
+        # clone, see clone
+        self._shared = False
         # uses the default Janggi setup if no setup is given
         if setup is None:
             setup = ['rehg gehr',
@@ -278,35 +695,156 @@ class Board:
                       represents a piece or an empty space and characters used for pieces are the
                       same as the symbols returned by the piece's get_symbol method
         """
+        # pieces in the move history no longer exist on the new board
+        self._history = []
         for i, col in enumerate(setup):
             for j, space in enumerate(col):
                 if space.isupper():
                     player = True
                 else:
                     player = False
-                space_num = self._col_labels[j] + str(i + 1)
+                square = i * 9 + j
 
                 # create piece depending on symbol in string
-                if space.lower() == 'k':
-                    new_piece = General(player, space_num)
-                elif space.lower() == 'g':
-                    new_piece = Guard(player, space_num)
-                elif space.lower() == 'h':
-                    new_piece = Horse(player, space_num)
-                elif space.lower() == 'e':
-                    new_piece = Elephant(player, space_num)
-                elif space.lower() == 'r':
-                    new_piece = Chariot(player, space_num)
-                elif space.lower() == 'c':
-                    new_piece = Cannon(player, space_num)
-                elif space.lower() == 's':
-                    new_piece = Soldier(player, space_num)
-                else:
+                piece_class = PIECE_CLASSES.get(space.lower())
+                if piece_class is None:
                     new_piece = None
+                else:
+                    new_piece = piece_class(player, square)
+
+                self.place_piece_at(new_piece, square)
+
+
 
-                self.place_piece(new_piece, space_num)
+    def square_codes(self):
+        """
+        creates the compact form of the board, see SQUARE_CODES
+        :return: bytes object with a byte for each square index
+        """
+        codes = bytearray(90)
+        for square, space in enumerate(self._spaces):
+            if space is not None:
+                codes[square] = space.get_type().get_code() + 1 + 8 * space.get_player()
+        return bytes(codes)
 
 
+    def load_codes(self, codes):
+        """
+        replaces every piece on the board with the pieces from the compact form made by
+        square_codes - only occupied squares create a piece, and the Zobrist hash and anything
+        else kept about the pieces is recalculated once at the end
+        :param codes: bytes object with a byte for each square index
+        """
+        if self._shared:
+            self.unshare()
+        self._history = []
+        spaces = self._spaces
+        key = 0
+        for square in range(90):
+            entry = SQUARE_CODES[codes[square]]
+            if entry is None:
+                spaces[square] = None
+            else:
+                piece_class, player = entry
+                spaces[square] = piece_class(player, square)
+                key ^= ZOBRIST_PIECES[piece_class._type][player][square]
+        self._key = key
+        self.refresh()
+
+
+    def refresh(self):
+        """
+        recalculates what is kept about the pieces after they were all replaced at once, which is
+        the piece lists, the evaluation terms and the AttackMap for the regular board
+        """
+        self._pieces = [[], []]
+        self._generals = [None, None]
+        self._material = 0
+        self._piece_square = 0
+        self._palace_attack = 0
+        for square, space in enumerate(self._spaces):
+            if space is not None:
+                self.add_to_lists(space)
+                self.add_terms(space, square, 1)
+        if self._attack_map is not None:
+            self._attack_map = AttackMap(self)
+
+
+    def clone(self, copy_on_write=False):
+        """
+        copies the board in its current position, with new pieces so either board can be changed
+        without affecting the other - the move tables and other fixed data are shared, and the
+        copy starts with no moves to undo
+        :param copy_on_write: optional, True to share the pieces and everything kept about them
+                              until either board is changed, which makes the copy nearly free for
+                              positions that are only looked at - whichever board changes first
+                              gets new pieces, so pieces taken from it before then are no longer
+                              on it
+        :return: a board of the same class
+        """
+        board = copy.copy(self)
+        board._history = []
+        if copy_on_write:
+            self._shared = True
+            board._shared = True
+        else:
+            board._shared = True
+            board.unshare()
+        return board
+
+
+    def unshare(self):
+        """
+        gives the board its own copy of the pieces and everything kept about them if it shares
+        them with a copy-on-write clone, called before the board is changed
+        """
+        if not self._shared:
+            return
+        spaces = self._spaces
+        new_pieces = {}
+        for square, space in enumerate(spaces):
+            if space is not None:
+                new_pieces[space] = space.copy()
+        self._spaces = [None if space is None else new_pieces[space] for space in spaces]
+        self._pieces = [[new_pieces[piece] for piece in pieces] for pieces in self._pieces]
+        self._generals = [new_pieces.get(general) for general in self._generals]
+
+        # moves made before the clone can still be undone, so their pieces are copied as well -
+        # pieces captured since then are not on the board but may be put back by pop_move
+        history = []
+        for record in self._history:
+            if record is not None:
+                piece, captured, old_square, index = record
+                for old_piece in piece, captured:
+                    if old_piece is not None and old_piece not in new_pieces:
+                        new_pieces[old_piece] = old_piece.copy()
+                record = (new_pieces[piece], new_pieces.get(captured), old_square, index)
+            history.append(record)
+        self._history = history
+        self._shared = False
+        if self._attack_map is not None:
+            self._attack_map = AttackMap(self)
+
+
+    def own_piece(self, piece):
+        """
+        finds the board's own piece on the square of a given piece, first giving the board its own
+        pieces if it shares them with a copy-on-write clone - a piece taken from the board before
+        then belongs to the clone as well, so the board's copy of it is used instead
+        :param piece: some object that inherited the Piece class
+        :return: the piece on the board
+        """
+        if self._shared:
+            self.unshare()
+        own = self._spaces[piece.get_square()]
+        if own is piece:
+            return piece
+        if own is None or own.get_type() is not piece.get_type() \
+                or own.get_player() != piece.get_player():
+            raise ValueError('the %s on %s is not on this board' % (piece.get_name(),
+                                                                     piece.get_space()))
+        return own
+
 
     def place_piece(self, piece, space_num):
         """
@@ -314,8 +852,107 @@ class Board:
         :param piece: some object that inherited the Piece class
         :param space_num: a string representing a space in algebraic notation, e.g. 'a1'
         """
-        col, row = self.space_to_coord(space_num)
-        self._spaces[col][row] = piece
+        self.place_piece_at(piece, self.space_to_square(space_num))
+
+
+    def place_piece_at(self, piece, square):
+        """
+        place a given piece on a given square
+        :param piece: some object that inherited the Piece class
+        :param square: the square index of the space
+        """
+        if self._shared:
+            self.unshare()
+        old_piece = self._spaces[square]
+        self._spaces[square] = piece
+        self._key ^= self.piece_key(old_piece, square) ^ self.piece_key(piece, square)
+        if old_piece is not None:
+            self.remove_from_lists(old_piece)
+            self.add_terms(old_piece, square, -1)
+        if piece is not None:
+            self.add_to_lists(piece)
+            self.add_terms(piece, square, 1)
+        if self._attack_map is not None:
+            self._attack_map.piece_placed(old_piece, piece, square)
+
+
+    def add_to_lists(self, piece):
+        """
+        adds a piece placed on the board to its player's piece list, and keeps it as the player's
+        general if it is one
+        :param piece: some object that inherited the Piece class
+        """
+        player = piece.get_player()
+        self._pieces[player].append(piece)
+        if piece.get_type() is GENERAL:
+            self._generals[player] = piece
+
+
+    def remove_from_lists(self, piece):
+        """
+        removes a piece taken off the board from its player's piece list
+        :param piece: some object that inherited the Piece class
+        """
+        player = piece.get_player()
+        self._pieces[player].remove(piece)
+        if self._generals[player] is piece:
+            self._generals[player] = None
+
+
+    def add_terms(self, piece, square, sign):
+        """
+        adds the values of a piece on a square to the evaluation terms, or takes them away
+        :param piece: some object that inherited the Piece class
+        :param square: the square index of the space
+        :param sign: 1 for a piece placed on the board, -1 for a piece taken off it
+        """
+        tables = EVALUATION_TABLES.get(piece.get_type())
+        if tables is None:
+            # not part of the game, such as the markers placed by the UI
+            return
+        material, piece_square, palace_attack = tables[piece.get_player()]
+        self._material += sign * material
+        self._piece_square += sign * piece_square[square]
+        self._palace_attack += sign * palace_attack[square]
+
+
+    def get_terms(self):
+        """
+        returns the evaluation terms of the pieces on the board from blue's side - blue's total
+        minus red's of the material, the piece-square values and the palace attack values, see
+        EVALUATION_TABLES - which are updated as pieces are placed, moved and captured
+        """
+        return self._material, self._piece_square, self._palace_attack
+
+
+    def get_score(self):
+        """returns the sum of the evaluation terms, positive if blue is ahead"""
+        return self._material + self._piece_square + self._palace_attack
+
+
+    @staticmethod
+    def piece_key(piece, square):
+        """
+        finds the Zobrist key of a piece on a square
+        :param piece: some object that inherited the Piece class, or None
+        :param square: the square index of the space
+        :return: the 64 bit key, or 0 for no piece or a piece that is not part of the game, such
+                 as the markers placed by the UI
+        """
+        if piece is None:
+            return 0
+        keys = ZOBRIST_PIECES.get(piece.get_type())
+        if keys is None:
+            return 0
+        return keys[piece.get_player()][square]
+
+
+    def get_key(self):
+        """
+        returns the Zobrist hash of the pieces on the board, which does not include whose turn
+        it is - it is updated as pieces are placed and moved, including by pop_move
+        """
+        return self._key
 
 
     def move_piece(self, piece, new_space):
@@ -324,10 +961,94 @@ class Board:
         :param piece: some object that inherited the Piece class
         :param new_space: a string representing a space in algebraic notation, e.g. 'a1'
         """
-        old_space = piece.get_space()
-        piece.set_space(new_space)
-        self.place_piece(None, old_space)
-        self.place_piece(piece, new_space)
+        self.move_piece_to(piece, self.space_to_square(new_space))
+
+
+    def move_piece_to(self, piece, new_square):
+        """
+        move a given piece to a given square and remove the piece from its previous square
+        :param piece: some object that inherited the Piece class
+        :param new_square: the square index of the space
+        """
+        piece = self.own_piece(piece)
+        old_square = piece.get_square()
+        captured = self._spaces[new_square]
+        self._spaces[old_square] = None
+        piece.set_square(new_square)
+        self._spaces[new_square] = piece
+        piece_type = piece.get_type()
+        player = piece.get_player()
+        keys = ZOBRIST_PIECES[piece_type][player]
+        self._key ^= keys[old_square] ^ keys[new_square]
+        material, piece_square, palace_attack = EVALUATION_TABLES[piece_type][player]
+        self._piece_square += piece_square[new_square] - piece_square[old_square]
+        self._palace_attack += palace_attack[new_square] - palace_attack[old_square]
+        if captured is not None:
+            self._key ^= self.piece_key(captured, new_square)
+            self.remove_from_lists(captured)
+            self.add_terms(captured, new_square, -1)
+        if self._attack_map is not None:
+            self._attack_map.piece_moved(piece, old_square, captured)
+
+
+    def push_move(self, piece, new_square):
+        """
+        move a given piece to a given square in a way that can be undone with pop_move - only the
+        moved piece, the captured piece, the square moved from and the captured piece's place in
+        its player's piece list are recorded
+        :param piece: some object that inherited the Piece class, or None to record a pass
+        :param new_square: the square index of the space
+        """
+        # the board gets its own pieces before the record is made, as unshare replaces the pieces
+        # in every record already on the stack
+        if self._shared:
+            self.unshare()
+        if piece is None:
+            self._history.append(None)
+            return
+
+        piece = self.own_piece(piece)
+        old_square = piece.get_square()
+        captured = self._spaces[new_square]
+        index = None
+        if captured is not None:
+            index = self._pieces[captured.get_player()].index(captured)
+        self._history.append((piece, captured, old_square, index))
+        self.move_piece_to(piece, new_square)
+
+
+    def pop_move(self):
+        """
+        undo the most recent move made with push_move, putting back any captured piece
+        :return: tuple containing the moved piece, the captured piece, the square moved from and
+                 the captured piece's place in its piece list, or None if the move was a pass
+        """
+        # a record taken off the stack before unshare would keep pieces this board no longer has
+        if self._shared:
+            self.unshare()
+        record = self._history.pop()
+        if record is None:
+            return None
+
+        piece, captured, old_square, index = record
+        new_square = piece.get_square()
+        self.move_piece_to(piece, old_square)
+        # captured pieces keep their position, so they can be placed straight back, and go back
+        # to the same place in the piece list so the pieces are always listed in the same order
+        self.place_piece_at(captured, new_square)
+        if captured is not None:
+            pieces = self._pieces[captured.get_player()]
+            pieces.insert(index, pieces.pop())
+        return record
+
+
+    def keep_move(self):
+        """
+        takes the most recent move made with push_move off the stack without undoing it, once it
+        is known to stand - moves that are not going to be undone are not kept, so the stack only
+        grows while a search is looking ahead
+        """
+        self._history.pop()
 
 
     def is_valid_space(self, space_num):
@@ -356,7 +1077,7 @@ class Board:
         """
         converts a string representing a space to coordinates in column, row format
         :param space_num: a string representing a space in algebraic notation, e.g. 'a1'
-        :return: a tuple containing the column and row of the space in self._spaces
+        :return: a tuple containing the column and row of the space
         """
         col = space_num[0]
         row = space_num[1:]
@@ -373,6 +1094,21 @@ class Board:
         return self._col_labels[col] + str(row + 1)
 
 
+    def space_to_square(self, space_num):
+        """
+        converts a string representing a space to its square index
+        :param space_num: a string representing a space in algebraic notation, e.g. 'a1'
+        :return: the square index of the space, or None if the space is not on the board
+        """
+        square = SPACE_INDEX.get(space_num)
+
+        # fall back to full validation for spaces written unusually, e.g. 'E9' or 'a01'
+        if square is None and self.is_valid_space(space_num):
+            col, row = self.space_to_coord(space_num.lower())
+            square = row * 9 + col
+        return square
+
+
     def board_to_strings(self):
         """
         creates a list representing the board state, either for printing or backup for reverting
@@ -382,10 +1118,10 @@ class Board:
         for i in range(0, 10):
             new_col = []
             for j in range(0, 9):
-                if self._spaces[j][i] is None:
+                if self._spaces[i * 9 + j] is None:
                     new_col += ' '
                 else:
-                    new_col += self._spaces[j][i].get_symbol()
+                    new_col += self._spaces[i * 9 + j].get_symbol()
             board_strings.append(new_col)
         return board_strings
 
@@ -426,34 +1162,20 @@ class Board:
 
     def get_player_pieces(self, player):
         """
-        gets list of pieces for a given player
+        gets list of pieces for a given player from the piece lists kept up to date on every move
         :param player: True for blue, False for red
-        :return: list of Piece objects
+        :return: a new list of Piece objects, so the board can be changed while it is in use
         """
-        pieces = []
-        for col in self._spaces:
-            for space in col:
-                if space is not None and space.get_player() == player:
-                    pieces.append(space)
-        return pieces
+        return list(self._pieces[player])
 
 
     def get_player_general(self, player):
         """
         returns the general of a given player
         :param player: True for blue, False for red
-        :return: the player's General object
+        :return: the player's General object, or None if the player has no general on the board
         """
-        col = [3, 4, 5]
-        if player:
-            row = [7, 8, 9]
-        else:
-            row = [0, 1, 2]
-        for c in col:
-            for r in row:
-                space = self.get_piece_on(c, r)
-                if space is not None and space.get_name() == 'General':
-                    return space
+        return self._generals[player]
 
 
     def get_piece_on(self, space_or_col, row=None):
@@ -464,230 +1186,985 @@ class Board:
         :return: the Piece object on the space or None
         """
         if row is not None:
-            space_or_col = self.coord_to_space(space_or_col, row)
-        if not self.is_valid_space(space_or_col):
+            if not (0 <= space_or_col < 9 and 0 <= row < 10):
+                return None
+            return self._spaces[row * 9 + space_or_col]
+        square = self.space_to_square(space_or_col)
+        if square is None:
             return None
-        col, row = self.space_to_coord(space_or_col)
-        return self._spaces[col][row]
-
+        return self._spaces[square]
 
-class JanggiGame:
-    """
-    JanggiGame class contains the encompassing information about a game. Contains the board, keeps
-    track of whose turn it is, and the game state. Also contains information about the diagonal
-    lines inside each palace for piece movement. Contains methods for piece movement, move
-    verification, check verification, game printing, etc.
-    """
 
-    def __init__(self, setup=None):
+    def get_piece_at(self, square):
         """
-        init method creates the board, sets player turn to blue, sets game state to unfinished, and
-        creates dictionary of palace diagonals
-        :param setup: optional, used to set up a game with a different start than usual, mostly
-                      for testing
+        returns the piece on a given square
+        :param square: the square index of the space
+        :return: the Piece object on the square or None
         """
-        self._board = Board(setup)
-        self._palace_connections = {'d1': ['e2'],
-                                    'f1': ['e2'],
-                                    'e2': ['d1', 'f1', 'd3', 'f3'],
-                                    'd3': ['e2'],
-                                    'f3': ['e2'],
-                                    'd8': ['e9'],
-                                    'f8': ['e9'],
-                                    'e9': ['d8', 'f8', 'd10', 'f10'],
-                                    'd10': ['e9'],
-                                    'f10': ['e9']}
-        # True for blue, False for red
-        self._turn = True
-        self._game_state = 'UNFINISHED'
-
+        return self._spaces[square]
 
-    def get_game_state(self):
-        """returns game state"""
-        return self._game_state
 
+    def get_spaces(self):
+        """returns the list of spaces indexed by square index, used for fast move generation"""
+        return self._spaces
 
-    def get_turn(self):
-        return self._turn
 
+    def enable_attack_map(self):
+        """starts keeping an AttackMap of the board up to date as pieces are placed and moved"""
+        if self._attack_map is None:
+            self._attack_map = AttackMap(self)
 
-    def __str__(self):
-        """gets a string of the board using the Board method"""
-        return str(self._board)
 
+    def get_attack_map(self):
+        """returns the AttackMap of the board, or None if it is not enabled"""
+        return self._attack_map
 
-    def is_valid_space(self, space_num):
-        """determines if the given space is valid using the Board method"""
-        return self._board.is_valid_space(space_num)
 
+    def is_attacked(self, square, player):
+        """
+        determines if a square is attacked by a given player, meaning one of their pieces could
+        capture an opposing general standing on it - works outward from the square rather than
+        finding every move of the player
+        :param square: the square index of the space
+        :param player: True for blue, False for red
+        :return: True if the square is attacked, False otherwise
+        """
+        if self._attack_map is not None:
+            return self._attack_map.get_count(square, player) > 0
+
+        spaces = self._spaces
+
+        # look for chariots and cannons along each line leaving the square, including the
+        # palace diagonals
+        for ray in SLIDER_RAYS[square]:
+            screen = False
+            for pos in ray:
+                space = spaces[pos]
+                if space is None:
+                    continue
+
+                # the first piece along the line attacks the square if it is a chariot, or is the
+                # screen for a cannon behind it unless it is a cannon itself
+                if not screen:
+                    if space.get_type() is CHARIOT and space.get_player() == player:
+                        return True
+                    if space.get_type() is CANNON:
+                        break
+                    screen = True
+
+                # the second piece along the line attacks the square if it is a cannon
+                else:
+                    if space.get_type() is CANNON and space.get_player() == player:
+                        return True
+                    break
 
-    def space_to_coord(self, space_num):
-        """converts from algebraic notation to coordinates using the Board method"""
-        return self._board.space_to_coord(space_num)
+        return self.is_step_attacked(square, player)
 
 
-    def coord_to_space(self, col, row):
-        """converts from coordinates to algebraic notation using the Board method"""
-        return self._board.coord_to_space(col, row)
+    def is_step_attacked(self, square, player):
+        """
+        determines if a square is attacked by any of a given player's pieces that move a single step
+        :param square: the square index of the space
+        :param player: True for blue, False for red
+        :return: True if the square is attacked, False otherwise
+        """
+        spaces = self._spaces
 
+        for source, piece_type, legs in STEP_ATTACKERS[player][square]:
+            space = spaces[source]
+            if space is not None and space.get_type() is piece_type and space.get_player() == player:
 
-    def get_piece_on(self, space_or_col, row=None):
-        """gets the piece on a given space using the Board method"""
-        return self._board.get_piece_on(space_or_col, row)
+                # horse and elephant attacks are blocked if a piece is in the way
+                blocked = False
+                for leg in legs:
+                    if spaces[leg] is not None:
+                        blocked = True
+                        break
 
+                if not blocked:
+                    return True
 
-    def setup(self, setup):
-        """sets up a game with the given setup using the Board method"""
-        self._board.setup_game(setup)
+        return False
 
 
-    @staticmethod
-    def on_board(col, row):
-        """returns True if the indices given represent a space on the board"""
-        if 0 <= col < 9 and 0 <= row < 10:
-            return True
-        return False
+    def chariot_targets(self, square, player):
+        """
+        finds the squares a chariot can move to by following each line until it is blocked
+        :param square: the square index of the chariot
+        :param player: True for blue, False for red
+        :return: a list of square indices that the chariot can go
+        """
+        spaces = self._spaces
+        possible_squares = []
 
+        # iterates through each of the lines the chariot can move along, including the palace
+        # diagonals
+        for ray in SLIDER_RAYS[square]:
+            for pos in ray:
+                space = spaces[pos]
 
-    @staticmethod
-    def in_palace(col, row):
-        """returns True if the indices given represent a space in either palace"""
-        if str(col) in '345' and str(row) in '012789':
-            return True
-        return False
+                # go no further if the space is blocked by own piece
+                if space is not None and space.get_player() == player:
+                    break
 
+                # empty spaces and enemy pieces can be moved to, but enemy pieces block the line
+                possible_squares.append(pos)
+                if space is not None:
+                    break
 
-    def get_general(self, player):
-        """gets the general of a given player using the Board method"""
-        return self._board.get_player_general(player)
+        return possible_squares
 
 
-    def get_pieces(self, player):
-        """gets the pieces of a given player using the Board method"""
-        return self._board.get_player_pieces(player)
-
-
-    def cannon_moves(self, piece):
+    def cannon_targets(self, square, player):
         """
-        method specifically for cannon movement since it is unique
-        :param piece: the Cannon object
-        :return: a list of spaces in algebraic notation that the cannon can go
+        finds the squares a cannon can move to by jumping exactly one piece along each line
+        :param square: the square index of the cannon
+        :param player: True for blue, False for red
+        :return: a list of square indices that the cannon can go
         """
+        spaces = self._spaces
+        possible_squares = []
 
-        # get location and movement information
-        piece_x, piece_y = piece.get_coords()
-        direct, moves, confined, pal_move = piece.get_legal_moves()
-        possible_spaces = []
-
-        # iterates through each of the possible movement directions
-        for x, y in direct:
-
-            # adds current position and movement to get space for prospective movement
-            pos_x = piece_x + x
-            pos_y = piece_y + y
+        # iterates through each of the lines the cannon can move along, including the palace
+        # diagonals - a cannon in the corner of a palace jumps over the center along the diagonal
+        for ray in SLIDER_RAYS[square]:
 
             # number of times the cannon has jumped another piece
             jumps = 0
 
-            # while the prospective space is on the board and the cannon has jumped less than twice
-            while self.on_board(pos_x, pos_y) and jumps < 2:
+            # follow the squares along the line until the cannon has jumped twice
+            for pos in ray:
 
                 # get piece on space of prospective movement
-                space = self.get_piece_on(pos_x, pos_y)
+                space = spaces[pos]
 
                 if space is not None:
                     # cannot jump cannons, so do not look further
-                    if space.get_name() == 'Cannon':
-                        jumps = 99
-                    else:
-                        jumps += 1
+                    if space.get_type() is CANNON:
+                        break
+                    jumps += 1
 
                     # if this is the second piece encountered and it is an opponent piece, it
                     # can be taken
-                    if jumps == 2 and space.get_player() != piece.get_player():
-                        possible_spaces.append(self.coord_to_space(pos_x, pos_y))
+                    if jumps == 2:
+                        if space.get_player() != player:
+                            possible_squares.append(pos)
+                        break
 
                 # add empty spaces after the first jump to possible spaces to move
                 elif jumps == 1:
-                    possible_spaces.append(self.coord_to_space(pos_x, pos_y))
+                    possible_squares.append(pos)
 
-                # look to the next space in the same direction
-                pos_x += x
-                pos_y += y
+        return possible_squares
 
-        # look for diagonal movement if cannon is on the corner of a palace
-        if piece.get_space() in self._palace_connections:
-            if piece_y == 0 or piece_y == 2:
-                possible_spaces += self.cannon_diagonals(piece, 'e2')
-            elif piece_y == 7 or piece_y == 9:
-                possible_spaces += self.cannon_diagonals(piece, 'e2')
 
-        return possible_spaces
+    def chariot_mask(self, square, player):
+        """
+        same as chariot_targets but as a board bit mask
+        :param square: the square index of the chariot
+        :param player: True for blue, False for red
+        :return: integer with bit n set for each square index n the chariot can go
+        """
+        mask = 0
+        for target in self.chariot_targets(square, player):
+            mask |= 1 << target
+        return mask
 
 
-    def cannon_diagonals(self, piece, palace_center):
+    def cannon_mask(self, square, player):
         """
-        method specifically for cannon movement in palaces
-        :param piece: the Cannon object
-        :param palace_center: the center of the palace the cannon is in
-        :return: list containing spaces the cannon can move to diagonally
+        same as cannon_targets but as a board bit mask
+        :param square: the square index of the cannon
+        :param player: True for blue, False for red
+        :return: integer with bit n set for each square index n the cannon can go
         """
+        mask = 0
+        for target in self.cannon_targets(square, player):
+            mask |= 1 << target
+        return mask
 
-        # cannon can only move diagonally if there is a piece in the center of the palace
-        center_piece = self.get_piece_on(palace_center)
 
-        if center_piece and center_piece.get_name() != 'Cannon':
-            piece_x, piece_y = piece.get_coords()
-            center_x, center_y = center_piece.get_coords()
+class BitBoard(Board):
+    """
+    BitBoard class is an alternative Board that also keeps track of piece positions as 90 bit
+    integers, with bit n set for a piece on square index n. Occupancy is stored for each player and
+    each piece type, plus a copy of all occupied squares ordered by column so that a whole column
+    can be read at once. Chariot and cannon movement is found with lookups on the occupancy of
+    the row and column instead of following each line space by space.
+    """
 
-            x = center_x - piece_x
-            y = center_y - piece_y
+    def __init__(self, setup=None):
+        """
+        init method creates the empty occupancy bit masks and then sets up the board using the
+        inherited init
+        :param setup: optional, used to set up a board with the given setup, mostly used for testing
+        """
+        # occupied squares ordered by square index (row * 9 + column)
+        self._occupied = 0
+        # occupied squares ordered by column (column * 10 + row)
+        self._occupied_columns = 0
+        # occupied squares of each player, index 0 for red and 1 for blue
+        self._player_occupied = [0, 0]
+        # occupied squares of each piece type, keyed by PieceType
+        self._piece_occupied = {}
+        super().__init__(setup)
 
-            # get the space in the palace opposite of the cannon
-            pos_x = center_x + x
-            pos_y = center_y + y
 
-            space = self.get_piece_on(pos_x, pos_y)
+    def toggle_piece(self, piece, square):
+        """
+        adds a piece to the occupancy bit masks, or removes it if it is already there
+        :param piece: some object that inherited the Piece class
+        :param square: the square index of the piece
+        """
+        bit = 1 << square
+        piece_type = piece.get_type()
+        self._occupied ^= bit
+        self._occupied_columns ^= 1 << (square % 9 * 10 + square // 9)
+        self._player_occupied[piece.get_player()] ^= bit
+        self._piece_occupied[piece_type] = self._piece_occupied.get(piece_type, 0) ^ bit
 
-            # check the corner opposite of the cannon is valid for movement
-            if space is None:
-                return [self.coord_to_space(pos_x, pos_y)]
-            elif space.get_player() != piece.get_player():
-                if space.get_name() != 'Cannon':
-                    return [self.coord_to_space(pos_x, pos_y)]
 
-        return []
+    def place_piece_at(self, piece, square):
+        """
+        place a given piece on a given square, keeping the occupancy bit masks up to date
+        :param piece: some object that inherited the Piece class
+        :param square: the square index of the space
+        """
+        if self._shared:
+            self.unshare()
+        if self._spaces[square] is not None:
+            self.toggle_piece(self._spaces[square], square)
+        if piece is not None:
+            self.toggle_piece(piece, square)
+        super().place_piece_at(piece, square)
 
 
-    def elephorse_blocked(self, movement, coords):
+    def move_piece_to(self, piece, new_square):
         """
-        check if the path of an elephant or horse is blocked
-        :param movement: tuple containing the column and row movement of the piece
-        :param coords: tuple containing coordinates of the piece
-        :return: True if movement is blocked, False otherwise
+        move a given piece to a given square, keeping the occupancy bit masks up to date
+        :param piece: some object that inherited the Piece class
+        :param new_square: the square index of the space
         """
-        x, y = movement
-        piece_x, piece_y = coords
+        piece = self.own_piece(piece)
+        if self._spaces[new_square] is not None:
+            self.toggle_piece(self._spaces[new_square], new_square)
+        self.toggle_piece(piece, piece.get_square())
+        self.toggle_piece(piece, new_square)
+        super().move_piece_to(piece, new_square)
 
-        while x != 0 and y != 0:
-            # check the spaces incrementally closer to the starting position
-            if x > 0:
-                x -= 1
-            else:
-                x += 1
-            if y > 0:
-                y -= 1
-            else:
-                y += 1
 
-            pos_x = piece_x + x
-            pos_y = piece_y + y
+    def unshare(self):
+        """gives the board its own occupancy bit masks and then uses the inherited unshare"""
+        if self._shared:
+            self._player_occupied = list(self._player_occupied)
+            self._piece_occupied = dict(self._piece_occupied)
+            super().unshare()
+
+
+    def refresh(self):
+        """recalculates the occupancy bit masks and then uses the inherited refresh"""
+        self._occupied = 0
+        self._occupied_columns = 0
+        self._player_occupied = [0, 0]
+        self._piece_occupied = {}
+        for square, space in enumerate(self._spaces):
+            if space is not None:
+                self.toggle_piece(space, square)
+        super().refresh()
+
+
+    def get_occupied(self, player=None):
+        """
+        returns the occupancy bit mask of the whole board or of a given player
+        :param player: optional, True for blue, False for red
+        :return: integer with bit n set for each occupied square index n
+        """
+        if player is None:
+            return self._occupied
+        return self._player_occupied[player]
+
+
+    def get_piece_occupied(self, piece_type):
+        """
+        returns the occupancy bit mask of a given piece type
+        :param piece_type: the PieceType of the piece, e.g. CANNON
+        :return: integer with bit n set for each square index n with that type of piece
+        """
+        return self._piece_occupied.get(piece_type, 0)
+
 
-            if self.get_piece_on(pos_x, pos_y) is not None:
+    def chariot_targets(self, square, player):
+        """
+        finds the squares a chariot can move to using the row and column occupancy lookups
+        :param square: the square index of the chariot
+        :param player: True for blue, False for red
+        :return: a list of square indices that the chariot can go
+        """
+        return mask_to_squares(self.chariot_mask(square, player))
+
+
+    def chariot_mask(self, square, player):
+        """
+        finds the squares a chariot can move to as a bit mask, see chariot_targets
+        :param square: the square index of the chariot
+        :param player: True for blue, False for red
+        :return: integer with bit n set for each square index n the chariot can go
+        """
+        row, col = divmod(square, 9)
+        occupied = self._occupied
+
+        # spaces reached along the row and the column
+        targets = ROW_LINES[col][occupied >> (row * 9) & 511][0] << (row * 9)
+        column = COLUMN_LINES[row][self._occupied_columns >> (col * 10) & 1023][0]
+        targets |= COLUMN_SPREAD[col][column]
+
+        # spaces reached along palace diagonals, which are only ever two spaces long
+        for ray in PALACE_DIAGONALS[square]:
+            for pos in ray:
+                targets |= 1 << pos
+                if occupied >> pos & 1:
+                    break
+
+        # own pieces cannot be taken
+        return targets & ~self._player_occupied[player]
+
+
+    def is_attacked(self, square, player):
+        """
+        determines if a square is attacked by a given player using the row and column occupancy
+        lookups for chariots and cannons
+        :param square: the square index of the space
+        :param player: True for blue, False for red
+        :return: True if the square is attacked, False otherwise
+        """
+        if self._attack_map is not None:
+            return self._attack_map.get_count(square, player) > 0
+
+        row, col = divmod(square, 9)
+        occupied = self._occupied
+        player_occupied = self._player_occupied[player]
+        chariots = self._piece_occupied.get(CHARIOT, 0) & player_occupied
+        cannons = self._piece_occupied.get(CANNON, 0)
+        player_cannons = cannons & player_occupied
+
+        # chariots reach the square along the row or column if the first piece is a chariot, and
+        # cannons reach it if the piece after a screen that is not a cannon is a cannon
+        slide, jumps = ROW_LINES[col][occupied >> (row * 9) & 511]
+        if (slide << (row * 9)) & chariots:
+            return True
+        for screen, jump in jumps:
+            if not (screen << (row * 9)) & cannons and (jump << (row * 9)) & player_cannons:
+                return True
+
+        spread = COLUMN_SPREAD[col]
+        slide, jumps = COLUMN_LINES[row][self._occupied_columns >> (col * 10) & 1023]
+        if spread[slide] & chariots:
+            return True
+        for screen, jump in jumps:
+            if not spread[screen] & cannons and spread[jump] & player_cannons:
                 return True
+
+        # chariots and cannons along palace diagonals
+        for ray in PALACE_DIAGONALS[square]:
+            for pos in ray:
+                if occupied >> pos & 1:
+                    if chariots >> pos & 1:
+                        return True
+                    break
+            if len(ray) == 2 and occupied >> ray[0] & 1 and not cannons >> ray[0] & 1:
+                if player_cannons >> ray[1] & 1:
+                    return True
+
+        return self.is_step_attacked(square, player)
+
+
+    def cannon_targets(self, square, player):
+        """
+        finds the squares a cannon can move to using the row and column occupancy lookups
+        :param square: the square index of the cannon
+        :param player: True for blue, False for red
+        :return: a list of square indices that the cannon can go
+        """
+        return mask_to_squares(self.cannon_mask(square, player))
+
+
+    def cannon_mask(self, square, player):
+        """
+        finds the squares a cannon can move to as a bit mask, see cannon_targets
+        :param square: the square index of the cannon
+        :param player: True for blue, False for red
+        :return: integer with bit n set for each square index n the cannon can go
+        """
+        row, col = divmod(square, 9)
+        occupied = self._occupied
+        cannons = self._piece_occupied.get(CANNON, 0)
+        targets = 0
+
+        # jumps along the row and the column, which are not allowed over another cannon
+        for screen, jump in ROW_LINES[col][occupied >> (row * 9) & 511][1]:
+            if not (screen << (row * 9)) & cannons:
+                targets |= jump << (row * 9)
+        spread = COLUMN_SPREAD[col]
+        for screen, jump in COLUMN_LINES[row][self._occupied_columns >> (col * 10) & 1023][1]:
+            if not spread[screen] & cannons:
+                targets |= spread[jump]
+
+        # jumps along palace diagonals, only possible from a corner over a piece in the center
+        for ray in PALACE_DIAGONALS[square]:
+            if len(ray) == 2 and occupied >> ray[0] & 1 and not cannons >> ray[0] & 1:
+                targets |= 1 << ray[1]
+
+        # own pieces and cannons cannot be taken
+        return targets & ~(self._player_occupied[player] | cannons)
+
+
+class AttackMap:
+    """
+    AttackMap class keeps count of how many pieces of each player attack each square of a board,
+    where a square is attacked if the piece could capture an opposing general standing on it. The
+    board updates the map whenever a piece is placed or moved, and only the pieces whose attacks
+    could have changed are recalculated - the pieces that moved and the pieces whose lines, screens
+    or legs pass through a square that changed.
+    """
+
+    def __init__(self, board):
+        """
+        init method finds the attacks of every piece already on the board
+        :param board: the Board object to keep track of
+        """
+        self._board = board
+        # number of attacking pieces on each square, index 0 for red and 1 for blue
+        self._counts = ([0] * 90, [0] * 90)
+        # squares attacked by each piece
+        self._attacks = {}
+        # squares each piece's attacks depend on
+        self._watched = {}
+        # pieces whose attacks depend on each square
+        self._watchers = [set() for square in range(90)]
+
+        for piece in board.get_spaces():
+            if piece is not None:
+                self.add_piece(piece)
+
+
+    def get_count(self, square, player):
+        """
+        returns the number of pieces of a given player attacking a square
+        :param square: the square index of the space
+        :param player: True for blue, False for red
+        """
+        return self._counts[player][square]
+
+
+    def find_attacks(self, piece):
+        """
+        finds the squares a piece attacks and the squares those attacks depend on
+        :param piece: some object that inherited the Piece class
+        :return: tuple containing a list of attacked square indices and a list of watched square
+                 indices
+        """
+        spaces = self._board.get_spaces()
+        square = piece.get_square()
+        piece_type = piece.get_type()
+        attacks = []
+        watched = []
+
+        if piece_type is CHARIOT:
+            # every space up to and including the first piece along each line
+            for ray in SLIDER_RAYS[square]:
+                for pos in ray:
+                    attacks.append(pos)
+                    watched.append(pos)
+                    if spaces[pos] is not None:
+                        break
+
+        elif piece_type is CANNON:
+            # every space after the screen up to and including the next piece along each line
+            for ray in SLIDER_RAYS[square]:
+                screen = False
+                for pos in ray:
+                    watched.append(pos)
+                    space = spaces[pos]
+                    if screen:
+                        attacks.append(pos)
+                        if space is not None:
+                            break
+                    elif space is not None:
+                        # cannons cannot jump other cannons
+                        if space.get_type() is CANNON:
+                            break
+                        screen = True
+
+        elif piece_type in STEP_MOVES:
+            # destinations whose legs are empty
+            for destination, legs in STEP_MOVES[piece_type][piece.get_player()][square]:
+                watched += legs
+                blocked = False
+                for leg in legs:
+                    if spaces[leg] is not None:
+                        blocked = True
+                if not blocked:
+                    attacks.append(destination)
+
+        return attacks, watched
+
+
+    def add_piece(self, piece):
+        """
+        adds the attacks of a piece to the map
+        :param piece: some object that inherited the Piece class
+        """
+        attacks, watched = self.find_attacks(piece)
+        counts = self._counts[piece.get_player()]
+        for square in attacks:
+            counts[square] += 1
+        for square in watched:
+            self._watchers[square].add(piece)
+        self._attacks[piece] = attacks
+        self._watched[piece] = watched
+
+
+    def remove_piece(self, piece):
+        """
+        removes the attacks of a piece from the map
+        :param piece: some object that inherited the Piece class
+        """
+        attacks = self._attacks.pop(piece, None)
+        if attacks is None:
+            return
+        counts = self._counts[piece.get_player()]
+        for square in attacks:
+            counts[square] -= 1
+        for square in self._watched.pop(piece):
+            self._watchers[square].discard(piece)
+
+
+    def update_squares(self, squares, moved):
+        """
+        recalculates the attacks of the pieces that moved and every piece watching the given squares
+        :param squares: square indices whose contents changed
+        :param moved: pieces that are now on the board at a new square
+        """
+        affected = set(moved)
+        for square in squares:
+            affected |= self._watchers[square]
+
+        for piece in affected:
+            self.remove_piece(piece)
+        for piece in affected:
+            # only add back pieces that are still on the board
+            if self._board.get_piece_at(piece.get_square()) is piece:
+                self.add_piece(piece)
+
+
+    def piece_placed(self, old_piece, piece, square):
+        """
+        updates the map after a piece was placed on a square
+        :param old_piece: the piece that was on the square before, or None
+        :param piece: the piece now on the square, or None
+        :param square: the square index of the space
+        """
+        if old_piece is not None:
+            self.remove_piece(old_piece)
+        if piece is not None:
+            self.update_squares((square,), (piece,))
+        else:
+            self.update_squares((square,), ())
+
+
+    def piece_moved(self, piece, old_square, captured):
+        """
+        updates the map after a piece was moved
+        :param piece: the piece that moved
+        :param old_square: the square index the piece moved from
+        :param captured: the piece that was captured, or None
+        """
+        if captured is not None:
+            self.remove_piece(captured)
+        self.update_squares((old_square, piece.get_square()), (piece,))
+
+
+class PositionCache:
+    """
+    PositionCache class remembers answers about positions that were already asked about, keyed by
+    the Zobrist hash from JanggiGame.position_key. Each position stores any of the legal moves,
+    whether each player is in check and whether each player is checkmated. Once the cache is full
+    the least recently used position is dropped. One cache can be shared by several games.
+    """
+
+    def __init__(self, size=100000):
+        """
+        init method creates the empty cache
+        :param size: optional, the most positions to keep
+        """
+        # maps a position key to a dictionary of answers, least recently used first
+        self._entries = OrderedDict()
+        self._size = size
+        # number of lookups that found an answer and that did not
+        self._hits = 0
+        self._misses = 0
+
+
+    def __len__(self):
+        """returns the number of positions in the cache"""
+        return len(self._entries)
+
+
+    def lookup(self, key, field):
+        """
+        finds a stored answer about a position
+        :param key: the position key
+        :param field: what is being asked, e.g. ('check', True) for whether blue is in check
+        :return: the stored answer, or None if there is none
+        """
+        entry = self._entries.get(key)
+        if entry is not None and field in entry:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[field]
+        self._misses += 1
+        return None
+
+
+    def store(self, key, field, value):
+        """
+        stores an answer about a position, dropping the least recently used position if the
+        cache is full
+        :param key: the position key
+        :param field: what is being answered, e.g. ('check', True) for whether blue is in check
+        :param value: the answer, which must not be None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {}
+            if len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        entry[field] = value
+
+
+    def clear(self):
+        """removes every position and resets the hit and miss counters"""
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+    def get_size(self):
+        """returns the most positions the cache keeps"""
+        return self._size
+
+
+    def get_hits(self):
+        """returns the number of lookups that found an answer"""
+        return self._hits
+
+
+    def get_misses(self):
+        """returns the number of lookups that did not find an answer"""
+        return self._misses
+
+
+
+class JanggiGame:
+    """
+    JanggiGame class contains the encompassing information about a game. Contains the board, keeps
+    track of whose turn it is, and the game state. Contains methods for piece movement, move
+    verification, check verification, game printing, etc.
+    """
+
+    def __init__(self, setup=None, bitboard=False, attack_map=False, cache=None,
+                 lazy_state=False):
+        """
+        init method creates the board, sets player turn to blue and sets game state to unfinished
+        :param setup: optional, used to set up a game with a different start than usual, mostly
+                      for testing
+        :param bitboard: optional, True to use the BitBoard instead of the regular Board
+        :param attack_map: optional, True to keep an AttackMap up to date on every move so checks
+                           are found by looking up the square of the general
+        :param cache: optional, a PositionCache that legal_moves, is_in_check and check_for_mate
+                      store their answers in and look them up from
+        :param lazy_state: optional, True for make_move to leave looking for checkmate until the
+                           game state is asked for, which gives the same results while saving the
+                           search on every move when many moves are made between get_game_state
+                           calls
+        """
+        if bitboard:
+            self._board = BitBoard(setup)
+        else:
+            self._board = Board(setup)
+        if attack_map:
+            self._board.enable_attack_map()
+        # True for blue, False for red
+        self._turn = True
+        self._game_state = 'UNFINISHED'
+        self._cache = cache
+        self._lazy_state = lazy_state
+        # True in lazy mode while the player whose turn it is may be checkmated - the game state
+        # is then found the first time it is asked for
+        self._state_pending = False
+
+
+    def get_game_state(self):
+        """returns game state, first looking for checkmate if make_move left it to now"""
+        if self._state_pending:
+            self._state_pending = False
+            if self.check_for_mate(self._turn):
+                if not self._turn:
+                    self._game_state = 'BLUE_WON'
+                else:
+                    self._game_state = 'RED_WON'
+        return self._game_state
+
+
+    def get_turn(self):
+        return self._turn
+
+
+    def evaluate(self):
+        """
+        scores the position for the player whose turn it is by material, piece-square values and
+        pieces inside the other player's palace - the board keeps these terms up to date on every
+        move and undo, so this takes the same time in any position, see Board.get_terms
+        :return: the score, positive if the player whose turn it is is ahead
+        """
+        if self._turn:
+            return self._board.get_score()
+        return -self._board.get_score()
+
+
+    def get_evaluation_terms(self):
+        """returns the evaluation terms from blue's side using the Board method"""
+        return self._board.get_terms()
+
+
+    def position_key(self):
+        """
+        returns the 64 bit Zobrist hash of the position, covering every piece and whose turn it
+        is - the board keeps its part up to date on every move, pass and undo, so this does not
+        look at the board
+        """
+        if self._turn:
+            return self._board.get_key() ^ ZOBRIST_BLUE_TURN
+        return self._board.get_key()
+
+
+    def get_cache(self):
+        """returns the PositionCache used by the game, or None"""
+        return self._cache
+
+
+    def clone(self, copy_on_write=False):
+        """
+        copies the game in its current position, with the same turn, game state and cache - the
+        board is copied in one pass without going through setup strings, see Board.clone
+        :param copy_on_write: optional, True to share the pieces with this game until either game
+                              changes its board, for branching many lines cheaply
+        :return: JanggiGame object, which starts with no moves to undo
+        """
+        game = copy.copy(self)
+        game._board = self._board.clone(copy_on_write)
+        return game
+
+
+    def to_bytes(self):
+        """
+        creates the compact form of the game, which covers the board, the turn and the game state
+        but not the moves made so far
+        :return: bytes object of POSITION_SIZE bytes
+        """
+        flags = self._turn | GAME_STATES.index(self.get_game_state()) << 1
+        return bytes((POSITION_FORMAT, flags)) + self._board.square_codes()
+
+
+    @classmethod
+    def from_bytes(cls, data, bitboard=False, attack_map=False, cache=None, lazy_state=False):
+        """
+        creates a game from the compact form made by to_bytes
+        :param data: bytes object of POSITION_SIZE bytes
+        :param bitboard: optional, True to use the BitBoard instead of the regular Board
+        :param attack_map: optional, True to keep an AttackMap up to date on every move
+        :param cache: optional, a PositionCache for the game
+        :param lazy_state: optional, True to look for checkmate only when the game state is asked
+                           for
+        :return: JanggiGame object
+        """
+        game = cls([], bitboard, attack_map, cache, lazy_state)
+        game.load_bytes(data)
+        return game
+
+
+    def load_bytes(self, data):
+        """
+        replaces the board, turn and game state with the compact form made by to_bytes, without
+        rebuilding the board from setup strings
+        :param data: bytes object of POSITION_SIZE bytes
+        """
+        if len(data) != POSITION_SIZE or data[0] != POSITION_FORMAT:
+            raise ValueError('not a position in format %d' % POSITION_FORMAT)
+        flags = data[1]
+        if flags >> 1 >= len(GAME_STATES) or max(data[2:]) >= len(SQUARE_CODES) \
+                or None in (SQUARE_CODES[code] for code in data[2:] if code):
+            raise ValueError('position contains unknown values')
+        self._board.load_codes(data[2:])
+        self._turn = bool(flags & 1)
+        self._game_state = GAME_STATES[flags >> 1]
+        self._state_pending = False
+
+
+    def to_fen(self):
+        """
+        creates a text form of the game similar to FEN in chess - the rows from row 1 to row 10
+        separated by slashes, with the setup symbols for pieces and a digit for each run of empty
+        spaces, then b or r for whose turn it is and then b or r for the winner, or - if the game
+        is unfinished, e.g. the standard setup is
+        rehg1gehr/4k4/1c5c1/s1s1s1s1s/9/9/S1S1S1S1S/1C5C1/4K4/REHG1GEHR b -
+        :return: string containing the text form
+        """
+        rows = []
+        for row in self.board_to_strings():
+            text = ''
+            empty = 0
+            for symbol in row:
+                if symbol == ' ':
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += symbol
+            if empty:
+                text += str(empty)
+            rows.append(text)
+
+        turn = 'b' if self._turn else 'r'
+        winner = {'UNFINISHED': '-', 'RED_WON': 'r', 'BLUE_WON': 'b'}[self.get_game_state()]
+        return '/'.join(rows) + ' ' + turn + ' ' + winner
+
+
+    @classmethod
+    def from_fen(cls, text, bitboard=False, attack_map=False, cache=None, lazy_state=False):
+        """
+        creates a game from the text form made by to_fen - the winner can be left out for an
+        unfinished game, and the turn as well for blue to move
+        :param text: string containing the text form
+        :param bitboard: optional, True to use the BitBoard instead of the regular Board
+        :param attack_map: optional, True to keep an AttackMap up to date on every move
+        :param cache: optional, a PositionCache for the game
+        :param lazy_state: optional, True to look for checkmate only when the game state is asked
+                           for
+        :return: JanggiGame object
+        """
+        fields = text.split()
+        if not 1 <= len(fields) <= 3:
+            raise ValueError('expected the board, turn and winner: %r' % text)
+        fields += ['b', '-'][len(fields) - 1:]
+        board, turn, winner = fields
+
+        codes = bytearray()
+        rows = board.split('/')
+        for row in rows:
+            start = len(codes)
+            for symbol in row:
+                if symbol.isdigit():
+                    codes += bytes(int(symbol))
+                elif symbol in SYMBOL_CODES:
+                    codes.append(SYMBOL_CODES[symbol])
+                else:
+                    raise ValueError('unknown piece %r in %r' % (symbol, text))
+            if len(codes) - start != 9:
+                raise ValueError('each row needs 9 spaces: %r' % text)
+        if len(rows) != 10 or turn not in ('b', 'r') or winner not in ('-', 'b', 'r'):
+            raise ValueError('not a position: %r' % text)
+
+        state = {'-': 'UNFINISHED', 'r': 'RED_WON', 'b': 'BLUE_WON'}[winner]
+        flags = (turn == 'b') | GAME_STATES.index(state) << 1
+        return cls.from_bytes(bytes((POSITION_FORMAT, flags)) + bytes(codes), bitboard,
+                              attack_map, cache, lazy_state)
+
+
+    def __str__(self):
+        """gets a string of the board using the Board method"""
+        return str(self._board)
+
+
+    def is_valid_space(self, space_num):
+        """determines if the given space is valid using the Board method"""
+        return self._board.is_valid_space(space_num)
+
+
+    def space_to_coord(self, space_num):
+        """converts from algebraic notation to coordinates using the Board method"""
+        return self._board.space_to_coord(space_num)
+
+
+    def coord_to_space(self, col, row):
+        """converts from coordinates to algebraic notation using the Board method"""
+        return self._board.coord_to_space(col, row)
+
+
+    def get_piece_on(self, space_or_col, row=None):
+        """gets the piece on a given space using the Board method"""
+        return self._board.get_piece_on(space_or_col, row)
+
+
+    def get_piece_at(self, square):
+        """gets the piece on a given square index using the Board method"""
+        return self._board.get_piece_at(square)
+
+
+    def setup(self, setup):
+        """sets up a game with the given setup using the Board method"""
+        if self._state_pending:
+            self.get_game_state()
+        self._board.setup_game(setup)
+
+
+    @staticmethod
+    def on_board(col, row):
+        """returns True if the indices given represent a space on the board"""
+        if 0 <= col < 9 and 0 <= row < 10:
+            return True
         return False
 
 
+    @staticmethod
+    def in_palace(col, row):
+        """returns True if the indices given represent a space in either palace"""
+        if 0 <= col < 9 and 0 <= row < 10 and IN_PALACE[row * 9 + col]:
+            return True
+        return False
+
+
+    def get_general(self, player):
+        """gets the general of a given player using the Board method"""
+        return self._board.get_player_general(player)
+
+
+    def get_pieces(self, player):
+        """gets the pieces of a given player using the Board method"""
+        return self._board.get_player_pieces(player)
+
+
+    def cannon_moves(self, piece):
+        """
+        method specifically for cannon movement since it is unique
+        :param piece: the Cannon object
+        :return: a list of square indices that the cannon can go
+        """
+        return self._board.cannon_targets(piece.get_square(), piece.get_player())
+
+
+    def chariot_moves(self, piece):
+        """
+        method specifically for chariot movement since it can move any number of spaces
+        :param piece: the Chariot object
+        :return: a list of square indices that the chariot can go
+        """
+        return self._board.chariot_targets(piece.get_square(), piece.get_player())
+
+
     def find_possible_moves(self, piece):
         """
         find the possible moves of a given piece based on positions of other pieces - does not
@@ -695,90 +2172,80 @@ class JanggiGame:
         :param piece: the Piece object for movement
         :return: list containing spaces of possible movement in algebraic notation
         """
+        return [SPACE_NAMES[square] for square in self.generate_moves(piece)]
 
-        # cannon movement is unique, so use different method
-        if piece.get_name() == 'Cannon':
-            return self.cannon_moves(piece)
-
-        # get location and movement information
-        piece_x, piece_y = piece.get_coords()
-        direct, moves, confined, pal_move = piece.get_legal_moves()
-        possible_spaces = []
 
-        # iterate through each of the possible movement directions
-        for x, y in direct:
-            movement = 0
-            pos_x = piece_x + x
-            pos_y = piece_y + y
-            blocked = False
-
-            # check spaces in a direction while the piece has not moved too far, the space is on
-            # the board, and the space is not blocked
-            while movement != moves and self.on_board(pos_x, pos_y) and not blocked:
+    def generate_moves(self, piece):
+        """
+        find the possible moves of a given piece as square indices, used internally by move
+        validation - does not take into account putting own king into check
+        :param piece: the Piece object for movement
+        :return: list containing square indices of possible movement
+        """
 
-                # get the piece (if any) that is on the prospective space
-                space = self.get_piece_on(pos_x, pos_y)
+        # cannon and chariot movement can go any distance, so use different methods
+        piece_type = piece.get_type()
+        if piece_type is CANNON:
+            return self.cannon_moves(piece)
+        if piece_type is CHARIOT:
+            return self.chariot_moves(piece)
 
-                # go no further if the space is blocked by own piece
-                if space is not None and space.get_player() == piece.get_player():
-                    blocked = True
+        # every other piece moves a single step, so the candidate destinations and the spaces
+        # that block them come from the move table
+        spaces = self._board.get_spaces()
+        player = piece.get_player()
+        possible_squares = []
 
-                # if confined to palace, make sure the space is in the palace before adding it
-                # to list of possible movements
-                elif confined:
-                    if self.in_palace(pos_x, pos_y):
-                        possible_spaces.append(self.coord_to_space(pos_x, pos_y))
+        for destination, legs in STEP_MOVES[piece_type][player][piece.get_square()]:
 
-                # add space to list if unblocked or occupied by enemy piece - additional blocking
-                # check for horse and elephant pieces
-                else:
-                    if space is not None:
-                        blocked = True
-                    if piece.get_name() == 'Elephant' or piece.get_name() == 'Horse':
-                        if not self.elephorse_blocked((x, y), (piece_x, piece_y)):
-                            possible_spaces.append(self.coord_to_space(pos_x, pos_y))
-                    else:
-                        possible_spaces.append(self.coord_to_space(pos_x, pos_y))
+            # the space cannot be moved to if it is occupied by own piece
+            space = spaces[destination]
+            if space is not None and space.get_player() == player:
+                continue
 
-                # look to next space in same direction and increment movement counter
-                pos_x += x
-                pos_y += y
-                movement += 1
+            # horse and elephant movement is blocked if a piece is in the way
+            blocked = False
+            for leg in legs:
+                if spaces[leg] is not None:
+                    blocked = True
+                    break
 
-        # logic for movement in palace along diagonals
-        if pal_move:
-            space_num = self.coord_to_space(piece_x, piece_y)
+            if not blocked:
+                possible_squares.append(destination)
 
-            # if the space is in the dictionary of palace movement, diagonal movement is
-            # potentially available
-            if space_num in self._palace_connections:
+        return possible_squares
 
-                # combine movement vectors to ensure movement is in legal direction
-                # (mostly for soldier pieces)
-                for x1, y1 in direct[0:2]:
-                    for x2, y2 in direct[2:]:
 
-                        # same logic as non-palace movement for the most part
-                        movement = 0
-                        pos_x = piece_x + x1 + x2
-                        pos_y = piece_y + y1 + y2
-                        blocked = False
+    def generate_move_mask(self, piece):
+        """
+        same as generate_moves but as a board bit mask, so a destination is checked with a
+        single bit test - chariots and cannons use the board's own masks
+        :param piece: the Piece object for movement
+        :return: integer with bit n set for each square index n the piece can move to
+        """
+        piece_type = piece.get_type()
+        if piece_type is CANNON:
+            return self._board.cannon_mask(piece.get_square(), piece.get_player())
+        if piece_type is CHARIOT:
+            return self._board.chariot_mask(piece.get_square(), piece.get_player())
 
-                        while movement != moves and self.in_palace(pos_x, pos_y) and not blocked:
-                            space = self.get_piece_on(pos_x, pos_y)
+        mask = 0
+        for square in self.generate_moves(piece):
+            mask |= 1 << square
+        return mask
 
-                            if space is not None and space.get_player() == piece.get_player():
-                                blocked = True
-                            elif self.in_palace(pos_x, pos_y):
-                                if space is not None:
-                                    blocked = True
-                                possible_spaces.append(self.coord_to_space(pos_x, pos_y))
 
-                            pos_x += x1 + x2
-                            pos_y += y1 + y2
-                            movement += 1
+    def squares_under_attack(self, pieces):
+        """
+        finds all squares that are being attacked
+        :param pieces: list of Piece objects
+        :return: set of square indices that the pieces can be moved to
+        """
+        squares = set()
+        for piece in pieces:
+            squares.update(self.generate_moves(piece))
 
-        return possible_spaces
+        return squares
 
 
     def spaces_under_attack(self, pieces):
@@ -787,11 +2254,7 @@ class JanggiGame:
         :param pieces: list of Piece objects
         :return: list of spaces in algebraic notation that the pieces can be moved to
         """
-        moves = []
-        for piece in pieces:
-            moves += self.find_possible_moves(piece)
-
-        return moves
+        return [SPACE_NAMES[square] for square in self.squares_under_attack(pieces)]
 
 
     @staticmethod
@@ -816,25 +2279,333 @@ class JanggiGame:
         else:
             return False
 
-        # get a list of the opponent pieces and the player general
-        opponent_pieces = self.get_pieces(not player)
-        general = self.get_general(player)
+        if self._cache is not None:
+            key = self.position_key()
+            in_check = self._cache.lookup(key, ('check', player))
+            if in_check is None:
+                in_check = self._board.is_attacked(self.get_general(player).get_square(),
+                                                   not player)
+                self._cache.store(key, ('check', player), in_check)
+            return in_check
 
-        # get a list of moves the opponent can make
-        opponent_moves = self.spaces_under_attack(opponent_pieces)
-
-        # if the space the general is on is in the list of opponent moves, the general is in check
-        if general.get_space() in opponent_moves:
+        # if an opponent piece could capture the general, the general is in check
+        general = self.get_general(player)
+        if self._board.is_attacked(general.get_square(), not player):
             return True
         return False
 
 
+    def is_square_attacked(self, space, player):
+        """
+        determines if a space is attacked by a given player, meaning one of their pieces could
+        capture an opposing general standing on it
+        :param space: a string representing a space in algebraic notation, or a square index
+        :param player: True for blue, False for red
+        :return: True if the space is attacked, False otherwise
+        """
+        if isinstance(space, str):
+            space = self._board.space_to_square(space)
+        return self._board.is_attacked(space, player)
+
+
+    def check_squares(self, player):
+        """
+        finds the squares involved in the checks against a player's general - the squares of the
+        checking pieces, the spaces between them and the general, cannon screens and the legs of
+        checking horses and elephants. Only moves to or from these squares can get the general out
+        of check without moving it.
+        :param player: True for blue, False for red
+        :return: set of square indices
+        """
+        spaces = self._board.get_spaces()
+        general_square = self.get_general(player).get_square()
+        squares = set()
+
+        # chariots and cannons along each line leaving the general
+        for ray in SLIDER_RAYS[general_square]:
+            screen = False
+            for i, pos in enumerate(ray):
+                space = spaces[pos]
+                if space is None:
+                    continue
+                if not screen:
+                    if space.get_type() is CHARIOT and space.get_player() != player:
+                        squares.update(ray[:i + 1])
+                    # any piece other than a cannon can be the screen for a cannon behind it
+                    if space.get_type() is CANNON:
+                        break
+                    screen = True
+                else:
+                    if space.get_type() is CANNON and space.get_player() != player:
+                        squares.update(ray[:i + 1])
+                    break
+
+        # pieces that move a single step and the legs they need
+        for source, piece_type, legs in STEP_ATTACKERS[not player][general_square]:
+            space = spaces[source]
+            if space is not None and space.get_type() is piece_type and space.get_player() != player:
+                blocked = False
+                for leg in legs:
+                    if spaces[leg] is not None:
+                        blocked = True
+                if not blocked:
+                    squares.add(source)
+                    squares.update(legs)
+
+        return squares
+
+
+    def pin_squares(self, player):
+        """
+        finds the squares where a change could expose a player's general to an attack - the spaces
+        on lines between the general and an opposing chariot or cannon, and the legs of opposing
+        horses and elephants that would attack the general if unblocked. A move that neither starts
+        nor ends on one of these squares cannot put the general in check.
+        :param player: True for blue, False for red
+        :return: set of square indices
+        """
+        spaces = self._board.get_spaces()
+        general_square = self.get_general(player).get_square()
+        squares = set()
+
+        # lines leaving the general up to the furthest opposing chariot or cannon
+        for ray in SLIDER_RAYS[general_square]:
+            furthest = -1
+            for i, pos in enumerate(ray):
+                space = spaces[pos]
+                if space is not None and space.get_player() != player:
+                    if space.get_type() is CHARIOT or space.get_type() is CANNON:
+                        furthest = i
+            squares.update(ray[:furthest + 1])
+
+        # legs of opposing horses and elephants in reach of the general
+        for source, piece_type, legs in STEP_ATTACKERS[not player][general_square]:
+            if legs:
+                space = spaces[source]
+                if space is not None and space.get_type() is piece_type and space.get_player() != player:
+                    squares.update(legs)
+
+        return squares
+
+
+    def leaves_general_safe(self, piece, square):
+        """
+        determines if moving a piece to a square leaves its player's general out of check by
+        trying the move and undoing it
+        :param piece: the Piece object for movement
+        :param square: the square index to move to
+        :return: True if the general is not in check after the move, False otherwise
+        """
+        player = piece.get_player()
+        self._board.push_move(piece, square)
+        safe = not self._board.is_attacked(self.get_general(player).get_square(), not player)
+        self._board.pop_move()
+        return safe
+
+
+    def iter_pieces_general_first(self, player):
+        """
+        generates the pieces of a player starting with the general, only finding the other pieces
+        once the general has been used
+        :param player: True for blue, False for red
+        :return: generator of Piece objects
+        """
+        general = self.get_general(player)
+        yield general
+        for piece in self.get_pieces(player):
+            if piece is not general:
+                yield piece
+
+
+    def iter_legal_targets(self, player, pieces=None):
+        """
+        generates the legal moves of a player piece by piece - pieces that cannot be pinned and
+        moves that cannot get out of check are filtered directly, and only moves touching the
+        squares found by pin_squares or check_squares are tried on the board. The moves of the
+        general come first. iter_legal_squares and legal_move_codes both use this, so the rules
+        are only written here. The board must not be changed while the generator is in use.
+        :param player: True for blue, False for red
+        :param pieces: optional, the pieces to generate moves for instead of all of the player's
+        :return: generator of (square from, list of squares to) tuples for the pieces with legal
+                 moves, with a tuple for each move of the general, ending with the general's
+                 square and a list of only that square for a pass
+        """
+        # moves are tried on the board, which gives a copy-on-write clone its own pieces, so that
+        # happens before any pieces are looked at
+        self._board.unshare()
+        general = self.get_general(player)
+        general_square = general.get_square()
+        in_check = self._board.is_attacked(general_square, not player)
+        leaves_general_safe = self.leaves_general_safe
+
+        # found once the first move of a piece other than the general needs it
+        relevant = None
+
+        if pieces is None:
+            pieces = self.iter_pieces_general_first(player)
+
+        for piece in pieces:
+            targets = self.generate_moves(piece)
+            if not targets:
+                continue
+            square_from = piece.get_square()
+
+            # the general's own moves always have to be tried, and are given one at a time so that
+            # looking for any legal move when in check stops at the first way out
+            if piece is general:
+                for square_to in targets:
+                    if leaves_general_safe(piece, square_to):
+                        yield square_from, [square_to]
+                continue
+
+            if relevant is None:
+                if in_check:
+                    relevant = self.check_squares(player)
+                else:
+                    relevant = self.pin_squares(player)
+
+            # moves away from the relevant squares cannot change whether the general is attacked,
+            # so they are legal unless in check and illegal if in check
+            if square_from in relevant:
+                targets = [square_to for square_to in targets
+                           if leaves_general_safe(piece, square_to)]
+            elif in_check:
+                targets = [square_to for square_to in targets
+                           if square_to in relevant and leaves_general_safe(piece, square_to)]
+            else:
+                targets = [square_to for square_to in targets
+                           if square_to not in relevant or leaves_general_safe(piece, square_to)]
+
+            if targets:
+                yield square_from, targets
+
+        # a player can pass as long as it does not leave the general in check
+        if not in_check:
+            yield general_square, [general_square]
+
+
+    def iter_legal_squares(self, player, pieces=None):
+        """
+        generates the legal moves of a player as square indices, see iter_legal_targets - the
+        moves of the general come first. The board must not be changed while the generator is in
+        use.
+        :param player: True for blue, False for red
+        :param pieces: optional, the pieces to generate moves for instead of all of the player's
+        :return: generator of (square from, square to) tuples, with a pass given as the general's
+                 square twice
+        """
+        for square_from, targets in self.iter_legal_targets(player, pieces):
+            for square_to in targets:
+                yield square_from, square_to
+
+
+    def iter_legal_moves(self, player=None):
+        """
+        generates the legal moves of a player one at a time, so callers that only need some of
+        them can stop early
+        :param player: optional, True for blue, False for red - defaults to the player whose turn
+                       it is
+        :return: generator of (space from, space to) tuples in algebraic notation, with a pass
+                 given as the general's space twice
+        """
+        if player is None:
+            player = self._turn
+        for square_from, square_to in self.iter_legal_squares(player):
+            yield SPACE_NAMES[square_from], SPACE_NAMES[square_to]
+
+
+    def legal_moves(self, player=None):
+        """
+        finds every legal move of a player, including passing if the player is not in check
+        :param player: optional, True for blue, False for red - defaults to the player whose turn
+                       it is
+        :return: list of (space from, space to) tuples in algebraic notation, with a pass given as
+                 the general's space twice
+        """
+        if self._cache is None:
+            return list(self.iter_legal_moves(player))
+
+        if player is None:
+            player = self._turn
+        key = self.position_key()
+        moves = self._cache.lookup(key, ('moves', player))
+        if moves is None:
+            moves = tuple(self.iter_legal_moves(player))
+            self._cache.store(key, ('moves', player), moves)
+            # passing is only left out when in check, and checkmate is being in check without
+            # any legal move
+            general_space = self.get_general(player).get_space()
+            in_check = (general_space, general_space) not in moves
+            self._cache.store(key, ('check', player), in_check)
+            self._cache.store(key, ('mate', player), not moves)
+        return list(moves)
+
+
+    def legal_move_codes(self, player=None, buffer=None):
+        """
+        finds every legal move of a player as integer codes, see PASS_MOVE, in the same order as
+        iter_legal_squares but appending each code straight to an array - a search can pass the
+        same buffer each time it reaches a ply instead of building new lists of tuples
+        :param player: optional, True for blue, False for red - defaults to the player whose turn
+                       it is
+        :param buffer: optional, an array of MOVE_TYPECODE to empty and fill instead of a new one
+        :return: the array of move codes
+        """
+        if player is None:
+            player = self._turn
+        if buffer is None:
+            buffer = array(MOVE_TYPECODE)
+        else:
+            del buffer[:]
+        append = buffer.append
+
+        for square_from, targets in self.iter_legal_targets(player):
+            # a pass is the only move of a piece to its own square
+            if targets[0] == square_from:
+                append(PASS_MOVE)
+                continue
+            base = square_from * 90
+            for square_to in targets:
+                append(base + square_to)
+        return buffer
+
+
+    def move_to_spaces(self, move):
+        """
+        converts an integer move code to algebraic notation for the player whose turn it is
+        :param move: integer move code, see PASS_MOVE
+        :return: tuple containing the space moved from and to, with a pass given as the general's
+                 space twice
+        """
+        if move == PASS_MOVE:
+            space = self.get_general(self._turn).get_space()
+            return space, space
+        square_from, square_to = divmod(move, 90)
+        return SPACE_NAMES[square_from], SPACE_NAMES[square_to]
+
+
     def check_for_mate(self, player):
         """
         determines if the specified player has been checkmated
         :param player: True for blue, False for red
         :return: True if the player is in checkmate, False otherwise
         """
+        if self._cache is not None:
+            key = self.position_key()
+            mate = self._cache.lookup(key, ('mate', player))
+            if mate is None:
+                mate = self.find_mate(player)
+                self._cache.store(key, ('mate', player), mate)
+            return mate
+        return self.find_mate(player)
+
+
+    def find_mate(self, player):
+        """
+        determines if the specified player has been checkmated without using the cache
+        :param player: True for blue, False for red
+        :return: True if the player is in checkmate, False otherwise
+        """
 
         # convert boolean to player color string for is_in_check
         player_color = self.player(player)
@@ -843,13 +2614,30 @@ class JanggiGame:
         if not self.is_in_check(player_color):
             return False
 
+        # look for a single legal move that gets out of check - the legal moves start with moving
+        # the general and then only consider capturing or blocking the checking pieces
+        for move in self.iter_legal_squares(player):
+            return False
+
+        return True
+
+
+    def check_for_mate_exhaustive(self, player):
+        """
+        determines if the specified player has been checkmated by trying every move of the player,
+        which is much slower than check_for_mate and kept for comparison
+        :param player: True for blue, False for red
+        :return: True if the player is in checkmate, False otherwise
+        """
+        if not self.is_in_check(self.player(player)):
+            return False
+
         # calls methods to see if checkmate can be avoided by moving the general
         # or by moving a friendly piece to block the check
         not_mate = self.check_for_mate_avoid(player) or self.check_for_mate_defense(player)
         return not not_mate
 
 
-
     def check_for_mate_avoid(self, player):
         """
         determines if the general can be moved to avoid being in check
@@ -859,10 +2647,10 @@ class JanggiGame:
 
         # get the player general and a list of its moves
         general = self.get_general(player)
-        gen_moves = self.find_possible_moves(general)
+        gen_moves = self.generate_moves(general)
 
-        # get a list of opponent moves
-        opponent_moves = self.spaces_under_attack(self.get_pieces(not player))
+        # get the squares the opponent can move to
+        opponent_moves = self.squares_under_attack(self.get_pieces(not player))
 
         # if there is a space the general can move to that is not under attack by an opponent piece
         # return True
@@ -883,33 +2671,28 @@ class JanggiGame:
         # get player color string for is_in_check
         player_color = self.player(player)
 
-        # save the game to backup to allow moving pieces around for experimentation
-        save_game = self._board.board_to_strings()
-
         friendly_pieces = self.get_pieces(player)
 
         # iterate through friendly pieces to see if check can be blocked
         for piece in friendly_pieces:
-            friendly_moves = self.find_possible_moves(piece)
+            friendly_moves = self.generate_moves(piece)
             for move in friendly_moves:
-                self._board.move_piece(piece, move)
 
-                # see if general is in check after making move and return True if not
-                if not self.is_in_check(player_color):
+                # try the move and see if general is in check after making it, then undo it
+                self._board.push_move(piece, move)
+                in_check = self.is_in_check(player_color)
+                self._board.pop_move()
 
-                    # revert game back
-                    self._board.setup_game(save_game)
+                if not in_check:
                     return True
 
-            # revert game back
-            self._board.setup_game(save_game)
-
         return False
 
 
     def make_move(self, space_from, space_to):
         """
-        tries to move a piece from one space to another
+        tries to move a piece from one space to another - the move cannot be undone with
+        pop_move, see push_move
         :param space_from: a string representing a space in algebraic notation
         :param space_to: a string representing a space in algebraic notation
         :return: True if the movement was successful, False otherwise
@@ -917,46 +2700,61 @@ class JanggiGame:
 
 
         #print('Trying to move from '+space_from+' to '+space_to)
-        # if the game is finished, do not do anything
-        if self.get_game_state() != 'UNFINISHED':
-            return False
-
-        # if the spaces are the same, the player skips their turn and movement succeeds
+        # if the game is finished, do not do anything - in lazy mode a move that turns out to be
+        # legal shows the player is not checkmated, so the game state is only needed for a pass
+        if space_from == space_to or not self._state_pending:
+            if self.get_game_state() != 'UNFINISHED':
+                return False
+
+        # if the spaces are the same, the player skips their turn and movement succeeds, unless
+        # the player is in check - passing would leave the general in check, so legal_moves
+        # leaves it out as well
         if space_from == space_to:
-            self._turn = not self._turn
+            if self.is_in_check(self.player(self._turn)):
+                return False
+            self.switch_turn()
             return True
 
-        # if either given spaces are not valid, movement fails
-        if not self.is_valid_space(space_from) or not self.is_valid_space(space_to):
+        # if either given spaces are not valid, movement fails - past this point spaces are
+        # handled as square indices
+        square_from = self._board.space_to_square(space_from)
+        square_to = self._board.space_to_square(space_to)
+        if square_from is None or square_to is None:
             #print('space is not on the board')
             return False
 
         # if there is no piece or the piece is owned by the opponent, movement fails
-        to_be_moved = self.get_piece_on(space_from)
+        to_be_moved = self.get_piece_at(square_from)
         if to_be_moved is None or to_be_moved.get_player() != self._turn:
             #print('piece does not exist or owned by opponent')
             return False
 
-        # get spaces the piece can move - if the destination space is not in the list of
-        # valid movements, movement fails
-        move_list = self.find_possible_moves(to_be_moved)
-        if space_to not in move_list:
+        # get squares the piece can move as a bit mask - if the destination square is not in it,
+        # movement fails
+        if not self.generate_move_mask(to_be_moved) >> square_to & 1:
             #print('destination is not in valid moveset')
             return False
 
-        # save the game in case the movement is actually not valid and make the move
-        save_game = self._board.board_to_strings()
-        self._board.move_piece(to_be_moved, space_to)
+        # make the move in a way that can be undone in case the movement is actually not valid
+        state_pending = self._state_pending
+        self._state_pending = False
+        self.push_square_move(square_from, square_to)
 
-        # determine if the move put the player's own general in check - if not, switch whose
-        # turn it is and check for checkmate
-        if not self.is_in_check(self.player(self._turn)):
+        # determine if the move put the player's own general in check - if not, check for
+        # checkmate of the player whose turn it now is
+        if not self.is_in_check(self.player(not self._turn)):
             #print('valid move')
             #print(self._board)
-            self._turn = not self._turn
+
+            # the move stands, so it is not kept for undoing
+            self._board.keep_move()
+
+            # in lazy mode checkmate is looked for by get_game_state
+            if self._lazy_state:
+                self._state_pending = True
 
             # if checkmate, update game state
-            if self.check_for_mate(self._turn):
+            elif self.check_for_mate(self._turn):
                 if not self._turn:
                     self._game_state = 'BLUE_WON'
                 else:
@@ -964,25 +2762,110 @@ class JanggiGame:
 
             return True
 
-        # if movement put own king in check, revert game to previous state and movement fails.
-        self._board.setup_game(save_game)
+        # if movement put own king in check, undo the move and movement fails.
+        self.pop_move()
+        self._state_pending = state_pending
         #print('move resulted in self-check')
         return False
 
 
+    def make_trusted_move(self, space_from, space_to):
+        """
+        makes a move that is already known to be legal, such as one from a game record, without
+        validating it or looking for check and checkmate - the move cannot be undone and the game
+        state is not updated, see set_game_state
+        :param space_from: a string representing a space in algebraic notation
+        :param space_to: a string representing a space in algebraic notation, the same as
+                         space_from for a pass
+        """
+        if self._state_pending:
+            self.get_game_state()
+        if space_from != space_to:
+            board = self._board
+            board.move_piece_to(board.get_piece_at(SPACE_INDEX[space_from]), SPACE_INDEX[space_to])
+        self._turn = not self._turn
+
+
+    def set_game_state(self, game_state):
+        """
+        sets the game state, e.g. after replaying a finished game with make_trusted_move
+        :param game_state: 'UNFINISHED', 'RED_WON' or 'BLUE_WON'
+        """
+        if game_state not in GAME_STATES:
+            raise ValueError('unknown game state %r' % game_state)
+        self._game_state = game_state
+        self._state_pending = False
+
+
+    def push_move(self, space_from, space_to):
+        """
+        makes a move without validating it and switches turn - the move can be undone with
+        pop_move, which is used for looking ahead without rebuilding the board
+        :param space_from: a string representing a space in algebraic notation
+        :param space_to: a string representing a space in algebraic notation, the same as
+                         space_from for a pass
+        """
+        if space_from == space_to:
+            self.push_square_move(None, None)
+        else:
+            self.push_square_move(self._board.space_to_square(space_from),
+                                  self._board.space_to_square(space_to))
+
+
+    def push_square_move(self, square_from, square_to):
+        """
+        same as push_move but with square indices
+        :param square_from: the square index of the piece to move
+        :param square_to: the square index to move to, the same as square_from for a pass
+        """
+        # a game state left for later belongs to the position before the move
+        if self._state_pending:
+            self.get_game_state()
+        if square_from == square_to:
+            self._board.push_move(None, square_to)
+        else:
+            self._board.push_move(self._board.get_piece_at(square_from), square_to)
+        self._turn = not self._turn
+
+
+    def push_move_code(self, move):
+        """
+        same as push_move but with an integer move code, see PASS_MOVE
+        :param move: integer move code
+        """
+        if move == PASS_MOVE:
+            self.push_square_move(None, None)
+        else:
+            self.push_square_move(move // 90, move % 90)
+
+
+    def pop_move(self):
+        """undoes the most recent move made with push_move and switches turn back"""
+        if self._state_pending:
+            self.get_game_state()
+        self._board.pop_move()
+        self._turn = not self._turn
+
+
     def board_to_strings(self):
         return self._board.board_to_strings()
 
 
     def setup_game(self, setup):
+        if self._state_pending:
+            self.get_game_state()
         self._board.setup_game(setup)
 
 
     def place_piece(self, piece, space_num):
+        if self._state_pending:
+            self.get_game_state()
         self._board.place_piece(piece, space_num)
 
 
     def switch_turn(self):
+        if self._state_pending:
+            self.get_game_state()
         self._turn = not self._turn
 
 
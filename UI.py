@@ -1,22 +1,24 @@
 from JanggiGame import JanggiGame
 from JanggiGame import Piece
+from JanggiGame import PieceType
+from JanggiGame import PositionCache
 
 
 class Move(Piece):
-    def __init__(self, player, position):
-        """
-        init method uses inherited init
-        """
-        super().__init__(player, position)
-        self._name = 'Possible Move'
-        self._symbol = 'x'
+    """
+    Move class marks a space a piece can move to when the board is printed
+    """
+    __slots__ = ()
+    # not a real piece, so it has no code and no movement
+    _type = PieceType(None, 'Possible Move', 'x', ())
 
 
 class UI:
 
     def __init__(self):
         setup = self.get_setup()
-        self._game = JanggiGame(setup)
+        # positions come back when a piece is chosen again, so keep the legal moves of each
+        self._game = JanggiGame(setup, cache=PositionCache())
 
 
     @staticmethod
@@ -28,32 +30,72 @@ class UI:
                   'Capitalization does not matter.\n')
             red = input('Red\'s back line setup from Blue\'s perspective: ')
             blue = input('Blue\'s back line setup from Blue\'s perspective: ')
-            red = red.lower()
-            blue = blue.upper()
-
-            if not len(red) == 9 or not len(blue) == 9:
-                print('ERROR: String length must be exactly 9 characters.')
-            elif not (red.startswith('r') and red.endswith('r')) or not (blue.startswith('R') and blue.endswith('R')):
-                print('ERROR: Back line must start and end with chariots (r).\n')
-            elif red[3:6] != 'g g' or blue[3:6] != 'G G':
-                print('ERROR: Middle pieces must be a guard, no piece, and then a guard (g g).\n')
-            elif 'h' not in red[1:3] or 'h' not in red[6:8] or 'H' not in blue[1:3] or 'H' not in blue[6:8]:
-                print('ERROR: There must be exactly one horse on each side of the general for each player (h).\n')
-            elif 'e' not in red[1:3] or 'e' not in red[6:8] or 'E' not in blue[1:3] or 'E' not in blue[6:8]:
-                print('ERROR: There must be exactly one elephant on each side of the general for each player (e).\n')
+
+            error = UI.setup_error(red, blue)
+            if error:
+                print(error)
             else:
-                setup = [red]
-                middle = ['    k    ',
-                          ' c     c ',
-                          's s s s s',
-                          '         ',
-                          '         ',
-                          'S S S S S',
-                          ' C     C ',
-                          '    K    ']
-                setup += middle
-                setup += [blue]
-                return setup
+                return UI.build_setup(red, blue)
+
+
+    @staticmethod
+    def setup_error(red, blue):
+        """
+        checks the back line setups of both players
+        :param red: red's back line from blue's perspective, e.g. 'rehg gher'
+        :param blue: blue's back line from blue's perspective
+        :return: error message if the setup is not allowed, None otherwise
+        """
+        red = red.lower()
+        blue = blue.upper()
+
+        if not len(red) == 9 or not len(blue) == 9:
+            return 'ERROR: String length must be exactly 9 characters.'
+        elif not (red.startswith('r') and red.endswith('r')) or not (blue.startswith('R') and blue.endswith('R')):
+            return 'ERROR: Back line must start and end with chariots (r).\n'
+        elif red[3:6] != 'g g' or blue[3:6] != 'G G':
+            return 'ERROR: Middle pieces must be a guard, no piece, and then a guard (g g).\n'
+        elif 'h' not in red[1:3] or 'h' not in red[6:8] or 'H' not in blue[1:3] or 'H' not in blue[6:8]:
+            return 'ERROR: There must be exactly one horse on each side of the general for each player (h).\n'
+        elif 'e' not in red[1:3] or 'e' not in red[6:8] or 'E' not in blue[1:3] or 'E' not in blue[6:8]:
+            return 'ERROR: There must be exactly one elephant on each side of the general for each player (e).\n'
+        return None
+
+
+    @staticmethod
+    def build_setup(red, blue):
+        """
+        creates the full board setup from the back line setups of both players
+        :param red: red's back line from blue's perspective, e.g. 'rehg gher'
+        :param blue: blue's back line from blue's perspective
+        :return: list of ten strings that can be passed to JanggiGame
+        """
+        setup = [red.lower()]
+        middle = ['    k    ',
+                  ' c     c ',
+                  's s s s s',
+                  '         ',
+                  '         ',
+                  'S S S S S',
+                  ' C     C ',
+                  '    K    ']
+        setup += middle
+        setup += [blue.upper()]
+        return setup
+
+
+    @staticmethod
+    def back_lines():
+        """
+        finds every back line that get_setup accepts, which differ by the order of the horse and
+        elephant on each side of the general
+        :return: list of back lines in lowercase, e.g. 'rehg gher'
+        """
+        back_lines = []
+        for left in 'he', 'eh':
+            for right in 'he', 'eh':
+                back_lines.append('r' + left + 'g g' + right + 'r')
+        return back_lines
 
 
     def play_game(self):
@@ -69,8 +111,7 @@ class UI:
                 else:
                     print('Valid moves are: ' + ', '.join(valid_moves))
 
-                    saved_game = self._game.board_to_strings()
-                    mock_game = JanggiGame(saved_game)
+                    mock_game = self._game.clone()
 
                     for move in valid_moves:
                         mock_game.place_piece(Move(self._game.get_turn(), move), move)
@@ -108,22 +149,15 @@ class UI:
 
 
     def find_valid_moves(self, piece):
-        saved_game = self._game.board_to_strings()
-
-        possible_moves = self._game.find_possible_moves(piece)
-
-        valid_moves = []
-
-        for move in possible_moves:
-            game_copy = JanggiGame(saved_game)
-
-            if game_copy.get_turn() != self._game.get_turn():
-                game_copy.switch_turn()
+        # only pieces of the player whose turn it is can be moved
+        if piece.get_player() != self._game.get_turn():
+            return []
 
-            if game_copy.make_move(piece.get_space(), move):
-                valid_moves.append(move)
+        space = piece.get_space()
 
-        return valid_moves
+        # the legal moves of the piece, leaving out passing
+        return [move for move_from, move in self._game.legal_moves()
+                if move_from == space and move != space]
 
 
 def main():
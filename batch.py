@@ -0,0 +1,326 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Evaluates many positions at once with NumPy. A PositionBatch holds N positions as an
+#              (N, 10, 9) int8 array of the bytes from JanggiGame.to_bytes, and counts material,
+#              piece-square values, mobility and pieces inside the palaces for all of them with a
+#              few array operations instead of a loop over the pieces of each game. The scores are
+#              the same as Engine.evaluate, using the value tables from JanggiGame. NumPy is
+#              optional - the rest of the game works without it, and only creating a
+#              PositionBatch needs it.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from JanggiGame import BLUE_PALACE
+from JanggiGame import CANNON
+from JanggiGame import CHARIOT
+from JanggiGame import HORSE
+from JanggiGame import PALACE_ATTACK_VALUES
+from JanggiGame import PIECE_SQUARE_VALUES
+from JanggiGame import PIECE_TYPES
+from JanggiGame import PIECE_VALUES
+from JanggiGame import POSITION_SIZE
+from JanggiGame import RED_PALACE
+from JanggiGame import SLIDER_RAYS
+from JanggiGame import SPACE_NAMES
+from JanggiGame import STEP_MOVES
+from engine import MOBILITY_VALUE
+
+
+# number of positions the mobility of sliding pieces is worked out for at a time, which keeps the
+# temporary arrays small however large the batch is
+CHUNK_SIZE = 1024
+
+
+class PositionBatch:
+    """
+    PositionBatch class contains many positions as NumPy arrays, each square holding the byte of
+    its piece as in JanggiGame.SQUARE_CODES - the code of the piece type plus one, plus 8 for blue,
+    or 0 when empty. Scores are blue minus red unless they say otherwise.
+    """
+
+    def __init__(self, squares, turns):
+        """
+        init method creates a batch from arrays
+        :param squares: array of shape (N, 10, 9) with the byte of each square
+        :param turns: array of shape (N,), True where it is blue's turn
+        """
+        if numpy is None:
+            raise ImportError('PositionBatch needs numpy')
+        self._squares = numpy.asarray(squares, dtype=numpy.int8).reshape(-1, 10, 9)
+        self._turns = numpy.asarray(turns, dtype=bool).reshape(-1)
+        if len(self._turns) != len(self._squares):
+            raise ValueError('%d positions but %d turns' % (len(self._squares), len(self._turns)))
+
+
+    @classmethod
+    def from_bytes(cls, states):
+        """
+        creates a batch from the compact form of games
+        :param states: list of bytes objects from JanggiGame.to_bytes
+        :return: PositionBatch object
+        """
+        if numpy is None:
+            raise ImportError('PositionBatch needs numpy')
+        data = numpy.frombuffer(b''.join(states), dtype=numpy.uint8).reshape(-1, POSITION_SIZE)
+        return cls(data[:, 2:].reshape(-1, 10, 9), data[:, 1] & 1)
+
+
+    @classmethod
+    def from_games(cls, games):
+        """
+        creates a batch from the current positions of games
+        :param games: list of JanggiGame objects
+        :return: PositionBatch object
+        """
+        return cls.from_bytes([game.to_bytes() for game in games])
+
+
+    def __len__(self):
+        """returns the number of positions"""
+        return len(self._squares)
+
+
+    def get_squares(self):
+        """returns the (N, 10, 9) array of square bytes"""
+        return self._squares
+
+
+    def get_turns(self):
+        """returns the (N,) array that is True where it is blue's turn"""
+        return self._turns
+
+
+    def piece_counts(self):
+        """
+        counts the pieces of each kind
+        :return: (N, 16) array with the number of pieces with each square byte, so column
+                 piece type code + 1 is red's count of that type and code + 9 is blue's
+        """
+        flat = self._squares.reshape(len(self), 90).astype(numpy.intp)
+        offsets = numpy.arange(len(self))[:, None] * 16
+        counts = numpy.bincount((flat + offsets).ravel(), minlength=len(self) * 16)
+        return counts.reshape(len(self), 16)
+
+
+    def material(self):
+        """
+        adds up the value of each player's pieces with the values used by the engine
+        :return: (N,) array of blue's material minus red's
+        """
+        values = numpy.zeros(16, dtype=numpy.int32)
+        for piece_type in PIECE_TYPES:
+            values[piece_type.get_code() + 1] = -PIECE_VALUES[piece_type]
+            values[piece_type.get_code() + 9] = PIECE_VALUES[piece_type]
+        return self.piece_counts() @ values
+
+
+    def piece_square(self, tables=None):
+        """
+        adds up the piece-square value of every piece
+        :param tables: optional, dictionary mapping PieceType to a list of 90 values by square
+                       index seen from blue's side, defaults to PIECE_SQUARE_VALUES - types that
+                       are left out are worth nothing on every square
+        :return: (N,) array of blue's total minus red's
+        """
+        if tables is None:
+            tables = PIECE_SQUARE_VALUES
+
+        # a table for each square byte, with red's rows reversed and negated
+        values = numpy.zeros((16, 10, 9), dtype=numpy.int32)
+        for piece_type, table in tables.items():
+            table = numpy.asarray(table, dtype=numpy.int32).reshape(10, 9)
+            values[piece_type.get_code() + 9] = table
+            values[piece_type.get_code() + 1] = -table[::-1]
+        return self.square_values(values.reshape(16, 90))
+
+
+    def palace_attack(self):
+        """
+        adds up the value of the pieces inside the other player's palace, see
+        JanggiGame.PALACE_ATTACK_VALUES
+        :return: (N,) array of blue's total minus red's
+        """
+        values = numpy.zeros((16, 90), dtype=numpy.int32)
+        for piece_type, value in PALACE_ATTACK_VALUES.items():
+            values[piece_type.get_code() + 9, list(RED_PALACE)] = value
+            values[piece_type.get_code() + 1, list(BLUE_PALACE)] = -value
+        return self.square_values(values)
+
+
+    def square_values(self, values):
+        """
+        adds up a value for the piece on every square
+        :param values: (16, 90) array with the value of each square byte on each square index
+        :return: (N,) array of totals
+        """
+        flat = self._squares.reshape(len(self), 90).astype(numpy.intp)
+        return values[flat, numpy.arange(90)].sum(axis=1)
+
+
+    def mobility(self):
+        """
+        counts the spaces the chariots, cannons and horses of each player could move to, the same
+        way as JanggiGame.generate_moves - moves that leave the general in check are counted
+        :return: (N, 2) array with red's count in column 0 and blue's in column 1
+        """
+        flat = self._squares.reshape(len(self), 90).astype(numpy.int16)
+        counts = numpy.zeros((len(self), 2), dtype=numpy.int64)
+
+        # horses - a move counts if the leg is empty and the space is not taken by own piece
+        sources, destinations, legs = HORSE_MOVES
+        source = flat[:, sources]
+        target = flat[:, destinations]
+        for player in (False, True):
+            code = HORSE.get_code() + 1 + 8 * player
+            own = (target != 0) & ((target >= 8) == player)
+            moves = (source == code) & (flat[:, legs] == 0) & ~own
+            counts[:, int(player)] += moves.sum(axis=1)
+
+        for start in range(0, len(self), CHUNK_SIZE):
+            counts[start:start + CHUNK_SIZE] += slider_mobility(flat[start:start + CHUNK_SIZE])
+        return counts
+
+
+    def in_palace(self):
+        """
+        finds the occupied squares inside either palace
+        :return: (N, 10, 9) array that is True for every piece inside a palace
+        """
+        return (self._squares != 0) & PALACE_MASK
+
+
+    def palace_attackers(self):
+        """
+        counts the pieces of each player inside the other player's palace
+        :return: (N, 2) array with red's count in column 0 and blue's in column 1
+        """
+        flat = self._squares.reshape(len(self), 90)
+        red = (flat[:, BLUE_PALACE] != 0) & (flat[:, BLUE_PALACE] < 8)
+        blue = flat[:, RED_PALACE] >= 8
+        return numpy.stack((red.sum(axis=1), blue.sum(axis=1)), axis=1)
+
+
+    def evaluate(self, tables=None):
+        """
+        scores every position for the player whose turn it is by material, piece-square values,
+        palace attack values and mobility, which with the default tables is the same as
+        Engine.evaluate
+        :param tables: optional, piece-square tables to use instead of the default ones, see
+                       piece_square, or False to leave the piece-square values out
+        :return: (N,) array of scores, positive where the player whose turn it is is ahead
+        """
+        mobility = self.mobility()
+        score = self.material() + self.palace_attack() \
+            + MOBILITY_VALUE * (mobility[:, 1] - mobility[:, 0])
+        if tables is not False:
+            score = score + self.piece_square(tables)
+        return numpy.where(self._turns, score, -score)
+
+
+def build_horse_moves():
+    """
+    creates flat tables of every horse move on the board, for looking up all of them at once
+    :return: tuple of three lists - the square moved from, the square moved to and the square
+             that blocks the move
+    """
+    sources = []
+    destinations = []
+    legs = []
+    for square in range(90):
+        for destination, (leg,) in STEP_MOVES[HORSE][False][square]:
+            sources.append(square)
+            destinations.append(destination)
+            legs.append(leg)
+    return sources, destinations, legs
+
+
+def build_slider_lines():
+    """
+    creates a table of the lines a chariot or cannon can move along from each square, padded to
+    8 lines of 9 squares with square index 90, which is used as an empty square off the board
+    :return: list with an entry for each square index, each entry being a list of 8 lines
+    """
+    table = []
+    for square in range(90):
+        lines = [list(ray) + [90] * (9 - len(ray)) for ray in SLIDER_RAYS[square]]
+        table.append(lines + [[90] * 9] * (8 - len(lines)))
+    return table
+
+
+def slider_mobility(flat):
+    """
+    counts the spaces the chariots and cannons of each player could move to
+    :param flat: (N, 90) array of square bytes
+    :return: (N, 2) array with red's count in column 0 and blue's in column 1
+    """
+    # only the lines of the squares holding a chariot or cannon are looked at
+    kinds = flat & 7
+    positions, squares = numpy.nonzero((kinds == CHARIOT.get_code() + 1)
+                                       | (kinds == CANNON.get_code() + 1))
+    source = flat[positions, squares]
+    lines = SLIDER_LINES[squares]
+
+    # an extra empty square lets the padding of the lines be looked up like any other square
+    padded = numpy.concatenate((flat, numpy.zeros((len(flat), 1), dtype=flat.dtype)), axis=1)
+    target = padded[positions[:, None, None], lines]
+    on_board = lines != 90
+    occupied = target != 0
+    enemy = occupied & ((target >= 8) != (source >= 8)[:, None, None])
+    cannon = (target & 7) == CANNON.get_code() + 1
+
+    # pieces and cannons passed before reaching each square along the line
+    passed = numpy.cumsum(occupied, axis=2, dtype=numpy.int8) - occupied
+    cannons_passed = numpy.cumsum(cannon, axis=2, dtype=numpy.int8) - cannon
+
+    # chariots reach every empty square up to the first piece, and can take it if it is an enemy,
+    # while cannons jump exactly one piece that is not a cannon, reaching the empty squares after
+    # it and taking the next piece if it is an enemy that is not a cannon
+    chariot_moves = (passed == 0) & (~occupied | enemy) & on_board
+    cannon_moves = (passed == 1) & (cannons_passed == 0) & (~occupied | enemy & ~cannon) & on_board
+    moves = numpy.where((source & 7) == CHARIOT.get_code() + 1,
+                        chariot_moves.sum(axis=(1, 2)), cannon_moves.sum(axis=(1, 2)))
+
+    counts = numpy.bincount(positions * 2 + (source >= 8), weights=moves, minlength=len(flat) * 2)
+    return counts.reshape(len(flat), 2).astype(numpy.int64)
+
+
+HORSE_MOVES = build_horse_moves()
+
+# the slider lines as a (90, 8, 9) array and the squares inside either palace as a (10, 9) array,
+# or None without numpy
+SLIDER_LINES = None
+PALACE_MASK = None
+if numpy is not None:
+    SLIDER_LINES = numpy.array(build_slider_lines(), dtype=numpy.intp)
+    PALACE_MASK = numpy.zeros(90, dtype=bool)
+    PALACE_MASK[list(RED_PALACE + BLUE_PALACE)] = True
+    PALACE_MASK = PALACE_MASK.reshape(10, 9)
+
+
+def evaluate_moves(game, tables=None):
+    """
+    scores the position after each legal move of the player whose turn it is in one batch, e.g.
+    for ordering moves or for the last ply of a search
+    :param game: the JanggiGame to move in, which is left unchanged
+    :param tables: optional, piece-square tables for the score, see PositionBatch.evaluate
+    :return: list of ((space from, space to), score) tuples, with scores for the player making
+             the move
+    """
+    moves = list(game.iter_legal_squares(game.get_turn()))
+    states = []
+    for square_from, square_to in moves:
+        game.push_square_move(square_from, square_to)
+        try:
+            states.append(game.to_bytes())
+        finally:
+            game.pop_move()
+    if not moves:
+        return []
+
+    # the scores are for the other player once the move is made
+    scores = -PositionBatch.from_bytes(states).evaluate(tables)
+    return [((SPACE_NAMES[square_from], SPACE_NAMES[square_to]), int(score))
+            for (square_from, square_to), score in zip(moves, scores)]
@@ -0,0 +1,226 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Opening book for the engine. The first moves of games from record files are counted
+#              by the Zobrist key of the position they were played in, and each move gets a weight
+#              from how the games went for the player who made it - 2 for a win, 1 for an
+#              unfinished game and 0 for a loss. The book is a file of fixed size entries sorted by
+#              key and move, which is memory-mapped and probed with a binary search, so looking up
+#              a position takes O(log n) reads whatever the size of the book. Any start position
+#              works, including the back line setups allowed by UI.get_setup, since the keys come
+#              from the positions themselves. Building streams the games through sorted runs in the
+#              same way as the position database.
+
+import os
+import struct
+import sys
+import time
+
+from JanggiGame import JanggiGame
+from JanggiGame import SPACE_INDEX
+from JanggiGame import SPACE_NAMES
+from posdb import HEADER
+from posdb import MappedFile
+from posdb import merge_runs
+from posdb import read_run
+from posdb import write_run
+from records import read_records
+
+
+# header of a book file, see posdb.HEADER
+BOOK_MAGIC = b'JBOK'
+BOOK_FORMAT = 1
+
+# an entry - position key, square moved from, square moved to, number of games the move was played
+# in and its weight
+ENTRY = struct.Struct('<QBBII')
+KEY = struct.Struct('<Q')
+
+# weight a move earns in each game for the player who made it, by the result of the game
+RESULT_WEIGHTS = {'UNFINISHED': (1, 1), 'RED_WON': (2, 0), 'BLUE_WON': (0, 2)}
+
+# how many moves from the start of each game go into the book
+BOOK_PLIES = 20
+
+# the most moves counted in memory before they are written out as a sorted run
+RUN_SIZE = 1000000
+
+
+class OpeningBook(MappedFile):
+    """
+    OpeningBook class looks up moves in a book file made by build_book. The file is memory-mapped,
+    so only the pages touched by the binary search are read.
+    """
+    _magic = BOOK_MAGIC
+    _format = BOOK_FORMAT
+    _entry = ENTRY
+    _name = 'an opening book'
+
+    def probe(self, key):
+        """
+        finds the book moves of a position
+        :param key: the position key, from JanggiGame.position_key
+        :return: list of (square from, square to, games, weight) tuples, empty if the position is
+                 not in the book
+        """
+        data = self._map
+        unpack = KEY.unpack_from
+
+        # the first entry with a key that is not lower
+        low = 0
+        high = self._size
+        while low < high:
+            middle = (low + high) // 2
+            if unpack(data, HEADER.size + middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = []
+        for offset in range(HEADER.size + low * ENTRY.size, HEADER.size + self._size * ENTRY.size,
+                            ENTRY.size):
+            entry = ENTRY.unpack_from(data, offset)
+            if entry[0] != key:
+                break
+            moves.append(entry[1:])
+        return moves
+
+
+    def probe_game(self, game):
+        """
+        finds the book moves of the current position of a game - moves that do not start from a
+        piece of the player whose turn it is are left out in case of a key collision
+        :param game: the JanggiGame to look up
+        :return: list of ((space from, space to), games, weight) tuples
+        """
+        player = game.get_turn()
+        moves = []
+        for square_from, square_to, games, weight in self.probe(game.position_key()):
+            piece = game.get_piece_at(square_from)
+            if piece is not None and piece.get_player() == player:
+                moves.append(((SPACE_NAMES[square_from], SPACE_NAMES[square_to]), games, weight))
+        return moves
+
+
+    def choose_move(self, game, rng=None):
+        """
+        picks a book move for the player whose turn it is - only legal moves are picked, so a key
+        collision or a book made from other rules cannot give a move that cannot be played
+        :param game: the JanggiGame to move in
+        :param rng: optional, random.Random object to pick moves at random in proportion to their
+                    weights, otherwise the move with the highest weight is picked
+        :return: tuple containing the space moved from and to, or None if the position is not in
+                 the book or every legal move in it has lost
+        """
+        moves = [entry for entry in self.probe_game(game) if entry[2] > 0]
+        if moves:
+            legal = set(game.legal_moves())
+            moves = [entry for entry in moves if entry[0] in legal]
+        if not moves:
+            return None
+        if rng is None:
+            return max(moves, key=lambda entry: (entry[2], entry[1]))[0]
+        return rng.choices([entry[0] for entry in moves], [entry[2] for entry in moves])[0]
+
+
+def sorted_moves(counts):
+    """
+    sorts book moves by key and move
+    :param counts: dictionary mapping (key, square from, square to) to [games, weight] lists
+    :return: generator of entry tuples in order
+    """
+    for move in sorted(counts):
+        yield move + tuple(counts[move])
+
+
+def build_book(sources, path, plies=BOOK_PLIES, min_games=1, run_size=RUN_SIZE, progress=None):
+    """
+    counts the first moves of games from record files and writes the book
+    :param sources: list of record file names, or of file objects, see records.read_records
+    :param path: name of the book file to write
+    :param plies: optional, how many moves from the start of each game to count
+    :param min_games: optional, moves played in fewer games than this are left out of the book
+    :param run_size: optional, the most moves to count in memory before writing a sorted run to a
+                     temporary file
+    :param progress: optional, a file such as sys.stderr to print progress to
+    :return: tuple containing the number of games and the number of moves in the book
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    runs = []
+    counts = {}
+    games = 0
+    try:
+        for source in sources:
+            for record in read_records(source):
+                weights = RESULT_WEIGHTS[record.get_result()]
+                game = record.new_game()
+                for space_from, space_to in record.get_moves()[:plies]:
+                    move = game.position_key(), SPACE_INDEX[space_from], SPACE_INDEX[space_to]
+                    entry = counts.get(move)
+                    if entry is None:
+                        entry = counts[move] = [0, 0]
+                    entry[0] += 1
+                    entry[1] += weights[game.get_turn()]
+                    game.make_trusted_move(space_from, space_to)
+
+                games += 1
+                if len(counts) >= run_size:
+                    runs.append(write_run(sorted_moves(counts), directory, ENTRY))
+                    counts = {}
+                if progress is not None and games % 10000 == 0:
+                    print('%d games' % games, file=progress)
+
+        if runs:
+            if counts:
+                runs.append(write_run(sorted_moves(counts), directory, ENTRY))
+                counts = {}
+            entries = merge_runs([read_run(run, ENTRY) for run in runs], 3)
+        else:
+            entries = sorted_moves(counts)
+
+        size = 0
+        with open(path, 'wb') as output:
+            output.write(HEADER.pack(BOOK_MAGIC, BOOK_FORMAT, 0))
+            pack = ENTRY.pack
+            for entry in entries:
+                if entry[3] >= min_games:
+                    output.write(pack(*entry))
+                    size += 1
+            output.seek(0)
+            output.write(HEADER.pack(BOOK_MAGIC, BOOK_FORMAT, size))
+    finally:
+        for run in runs:
+            os.remove(run)
+
+    return games, size
+
+
+def main():
+    """
+    builds a book from the command line as 'book.py build BOOK RECORDS...', or shows the book moves
+    of positions given in JanggiGame.to_fen form as 'book.py probe BOOK FEN...'
+    """
+    if len(sys.argv) < 3 or sys.argv[1] not in ('build', 'probe'):
+        print('usage: book.py build BOOK RECORDS... | book.py probe BOOK [FEN...]')
+        sys.exit(2)
+
+    if sys.argv[1] == 'build':
+        start = time.perf_counter()
+        games, size = build_book(sys.argv[3:], sys.argv[2], progress=sys.stderr)
+        print('%d games, %d book moves in %.2f seconds'
+              % (games, size, time.perf_counter() - start))
+        return
+
+    with OpeningBook(sys.argv[2]) as book:
+        for text in sys.argv[3:] or [JanggiGame().to_fen()]:
+            game = JanggiGame.from_fen(text)
+            start = time.perf_counter()
+            moves = book.probe_game(game)
+            micros = (time.perf_counter() - start) * 1000000
+            print('%s: %d moves (%.1f us)' % (text, len(moves), micros))
+            for (space_from, space_to), games, weight in sorted(moves, key=lambda entry: -entry[2]):
+                print('  %s-%s  games %d  weight %d' % (space_from, space_to, games, weight))
+            print('  best %s' % (book.choose_move(game),))
+
+
+if __name__ == '__main__':
+    main()
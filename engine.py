@@ -0,0 +1,426 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Computer player for JanggiGame. Searches the moves of the player whose turn it is
+#              with negamax alpha-beta search and iterative deepening, stopping once a time or node
+#              budget runs out, and scores positions by the material, piece-square and palace
+#              attack terms the board keeps up to date on every move, together with mobility.
+#              Moves are tried in order of the best move from the previous iteration, captures of
+#              the most valuable pieces, killer moves and the history heuristic. An opening book can
+#              be given, which is probed before searching.
+
+import sys
+import time
+from array import array
+
+from JanggiGame import CANNON
+from JanggiGame import CHARIOT
+from JanggiGame import HORSE
+from JanggiGame import JanggiGame
+from JanggiGame import MOVE_TYPECODE
+from JanggiGame import PASS_MOVE
+from JanggiGame import PIECE_VALUES
+from book import OpeningBook
+
+# value of each space a piece could move to, only counted for the pieces that move far enough for
+# it to matter
+MOBILITY_VALUE = 5
+MOBILE_PIECES = (CHARIOT, CANNON, HORSE)
+
+# score of checkmating, reduced by the number of moves it takes so faster mates score higher
+MATE_SCORE = 1000000
+# scores further from zero than this are checkmates
+MATE_BOUND = MATE_SCORE - 1000
+
+# the deepest the search goes, including captures searched past the depth
+MAX_PLY = 128
+
+# number of nodes between checks of the time budget
+CHECK_INTERVAL = 1024
+
+# moves are ordered as single integers holding the ordering score, then the place of the move in
+# the generated order so moves with equal scores keep it, then the move code in the lowest bits
+MOVE_BITS = 14
+INDEX_BITS = 10
+MOVE_MASK = (1 << MOVE_BITS) - 1
+INDEX_LIMIT = (1 << INDEX_BITS) - 1
+
+
+class SearchStopped(Exception):
+    """raised inside the search once the time or node budget runs out"""
+    pass
+
+
+class Engine:
+    """
+    Engine class finds the best move for the player whose turn it is in a JanggiGame. The game is
+    searched with push_move_code and pop_move, so it is back in the same position once the
+    search ends. Moves are handled as integer codes, see JanggiGame.PASS_MOVE, generated into
+    an array for each ply and sorted in a list for each ply, both reused throughout the search.
+    The history heuristic is kept between searches, at half weight for each new one.
+    """
+
+    def __init__(self, game, time_limit=None, node_limit=None, max_depth=None, book=None):
+        """
+        init method sets up the search budget and the move ordering tables
+        :param game: the JanggiGame to search
+        :param time_limit: optional, the most seconds to search for
+        :param node_limit: optional, the most positions to search
+        :param max_depth: optional, the deepest iteration to search, which is the only limit if
+                          there is no time or node limit
+        :param book: optional, an OpeningBook whose best move is played without searching when
+                     the position is in it
+        """
+        self._game = game
+        self._book = book
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+        if max_depth is None:
+            if time_limit is None and node_limit is None:
+                max_depth = 4
+            else:
+                max_depth = MAX_PLY // 2
+        self._max_depth = max_depth
+
+        # number of positions searched and when to stop
+        self._nodes = 0
+        self._deadline = None
+        # True once the first iteration is done, since it always runs to the end
+        self._can_stop = False
+        # depth of the last iteration that finished
+        self._depth = 0
+
+        # principal variation found below each ply
+        self._pv = [[] for ply in range(MAX_PLY + 1)]
+        # best move found in each position during a search, keyed by position key, tried first
+        # in the next iteration
+        self._best_moves = {}
+        # two quiet moves that caused a cutoff at each ply
+        self._killers = [[None, None] for ply in range(MAX_PLY + 1)]
+        # how often each quiet move caused a cutoff, weighted by depth, indexed by move code
+        self._history = [0] * PASS_MOVE
+        # array the moves of each ply are generated into, and list they are sorted in
+        self._buffers = [array(MOVE_TYPECODE) for ply in range(MAX_PLY + 1)]
+        self._orders = [[] for ply in range(MAX_PLY + 1)]
+
+
+    def get_nodes(self):
+        """returns the number of positions searched by the last search"""
+        return self._nodes
+
+
+    def get_depth(self):
+        """returns the depth of the last iteration that finished"""
+        return self._depth
+
+
+    def evaluate(self):
+        """
+        scores the position for the player whose turn it is by the evaluation terms kept by the
+        board, see JanggiGame.evaluate, and the number of spaces each chariot, cannon and horse
+        could move to, which is the only part that looks at the pieces
+        :return: the score, positive if the player whose turn it is is ahead
+        """
+        game = self._game
+        mobility = 0
+        for player, sign in (True, 1), (False, -1):
+            for piece in game.get_pieces(player):
+                if piece.get_type() in MOBILE_PIECES:
+                    mobility += sign * len(game.generate_moves(piece))
+
+        if game.get_turn():
+            return game.evaluate() + MOBILITY_VALUE * mobility
+        return game.evaluate() - MOBILITY_VALUE * mobility
+
+
+    def order_moves(self, moves, ply, best_move, captures_only=False):
+        """
+        sorts moves so the ones most likely to be best are searched first - the best move found
+        earlier in the position, captures by the value taken and then the value of the capturing
+        piece, killer moves, quiet moves by history and passing last. The moves are sorted in
+        place in the list kept for the ply, as integers from which the move code is taken with
+        MOVE_MASK.
+        :param moves: array of move codes
+        :param ply: the number of moves since the start of the search
+        :param best_move: the best move found earlier in the position, or None
+        :param captures_only: optional, True to leave out passes and moves that capture nothing
+        :return: the list of the ply, sorted
+        """
+        game = self._game
+        killers = self._killers[ply]
+        history = self._history
+        order = self._orders[ply]
+        del order[:]
+        append = order.append
+        for index, move in enumerate(moves):
+            if move == PASS_MOVE:
+                if captures_only:
+                    continue
+                score = 1 << 40 if move == best_move else -1
+            else:
+                captured = game.get_piece_at(move % 90)
+                if captured is None and captures_only:
+                    continue
+                if move == best_move:
+                    score = 1 << 40
+                elif captured is not None:
+                    attacker = game.get_piece_at(move // 90)
+                    score = (1 << 32) + PIECE_VALUES[captured.get_type()] * 16 \
+                        - PIECE_VALUES[attacker.get_type()] // 100
+                elif move == killers[0]:
+                    score = (1 << 31) + 1
+                elif move == killers[1]:
+                    score = 1 << 31
+                else:
+                    score = history[move]
+            append((score << INDEX_BITS | INDEX_LIMIT - index) << MOVE_BITS | move)
+        order.sort(reverse=True)
+        return order
+
+
+    def count_node(self):
+        """counts a searched position and stops the search once the budget runs out"""
+        self._nodes += 1
+        if not self._can_stop:
+            return
+        if self._node_limit is not None and self._nodes >= self._node_limit:
+            raise SearchStopped()
+        if self._deadline is not None and self._nodes % CHECK_INTERVAL == 0 \
+                and time.perf_counter() >= self._deadline:
+            raise SearchStopped()
+
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        searches the position with alpha-beta pruning
+        :param depth: number of moves left to search before only searching captures
+        :param alpha: the score the player whose turn it is already has elsewhere
+        :param beta: the score the other player already has elsewhere
+        :param ply: the number of moves since the start of the search
+        :return: the score of the position for the player whose turn it is
+        """
+        self._pv[ply] = []
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.quiescence(alpha, beta, ply)
+        self.count_node()
+
+        game = self._game
+        moves = game.legal_move_codes(game.get_turn(), self._buffers[ply])
+
+        # passing is legal whenever the player is not in check, so no moves means checkmate
+        if not moves:
+            return ply - MATE_SCORE
+
+        key = game.position_key()
+        best_score = -MATE_SCORE - 1
+        best_move = None
+        for entry in self.order_moves(moves, ply, self._best_moves.get(key)):
+            move = entry & MOVE_MASK
+            quiet = move == PASS_MOVE or game.get_piece_at(move % 90) is None
+
+            game.push_move_code(move)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    self._pv[ply] = [move] + self._pv[ply + 1]
+
+                    # the other player would not allow this position, so stop searching it
+                    if alpha >= beta:
+                        if quiet and move != PASS_MOVE:
+                            killers = self._killers[ply]
+                            if killers[0] != move:
+                                killers[1] = killers[0]
+                                killers[0] = move
+                            self._history[move] += depth * depth
+                        break
+
+        self._best_moves[key] = best_move
+        return best_score
+
+
+    def quiescence(self, alpha, beta, ply):
+        """
+        searches only captures, or every move if in check, until the position is quiet so the
+        evaluation is not fooled by a piece that is about to be taken
+        :param alpha: the score the player whose turn it is already has elsewhere
+        :param beta: the score the other player already has elsewhere
+        :param ply: the number of moves since the start of the search
+        :return: the score of the position for the player whose turn it is
+        """
+        self._pv[ply] = []
+        self.count_node()
+        if ply >= MAX_PLY:
+            return self.evaluate()
+
+        game = self._game
+        player = game.get_turn()
+
+        # when in check every move has to be searched, otherwise the player can settle for the
+        # evaluation instead of capturing
+        moves = self._buffers[ply]
+        in_check = game.is_in_check(game.player(player))
+        if in_check:
+            best_score = -MATE_SCORE - 1
+            game.legal_move_codes(player, moves)
+            if not moves:
+                return ply - MATE_SCORE
+        else:
+            best_score = self.evaluate()
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+            game.legal_move_codes(player, moves)
+
+        for entry in self.order_moves(moves, ply, None, not in_check):
+            move = entry & MOVE_MASK
+            game.push_move_code(move)
+            try:
+                score = -self.quiescence(-beta, -alpha, ply + 1)
+            finally:
+                game.pop_move()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    self._pv[ply] = [move] + self._pv[ply + 1]
+                    if alpha >= beta:
+                        break
+
+        return best_score
+
+
+    def search(self, output=None):
+        """
+        finds the best move with iterative deepening, searching one move deeper each iteration
+        until the depth, time or node limit is reached - the first iteration always finishes
+        :param output: optional, a file such as sys.stdout to print each finished iteration to
+        :return: tuple containing the best move as (space from, space to), its score for the
+                 player whose turn it is and the principal variation as a list of moves, with a
+                 pass given as the general's space twice, or None if the game is over or the
+                 player is checkmated - a book move has a score of 0
+        """
+        game = self._game
+        if game.get_game_state() != 'UNFINISHED':
+            return None
+
+        if self._book is not None:
+            move = self._book.choose_move(game)
+            if move is not None:
+                if output is not None:
+                    print('book move %s-%s' % move, file=output)
+                return move, 0, [move]
+
+        start = time.perf_counter()
+        self._nodes = 0
+        self._depth = 0
+        self._can_stop = False
+        self._deadline = None
+        if self._time_limit is not None:
+            self._deadline = start + self._time_limit
+
+        # killers and best moves are specific to the position, so they start over for each search
+        self._killers = [[None, None] for ply in range(MAX_PLY + 1)]
+        self._best_moves = {}
+        self._history = [value // 2 for value in self._history]
+
+        result = None
+        for depth in range(1, self._max_depth + 1):
+            try:
+                score = self.negamax(depth, -MATE_SCORE - 1, MATE_SCORE + 1, 0)
+            except SearchStopped:
+                break
+            self._can_stop = True
+            self._depth = depth
+
+            # a checkmated player has no moves to choose from
+            if not self._pv[0]:
+                break
+
+            # a pass is written as the general's space, so the moves are played through to find it
+            pv = []
+            for move in self._pv[0]:
+                pv.append(game.move_to_spaces(move))
+                game.push_move_code(move)
+            for move in self._pv[0]:
+                game.pop_move()
+            result = pv[0], score, pv
+
+            if output is not None:
+                seconds = time.perf_counter() - start
+                print('depth %2d  score %7s  nodes %8d  nps %6.0f  pv %s'
+                      % (depth, score_to_string(score), self._nodes,
+                         self._nodes / max(seconds, 1e-9),
+                         ' '.join(space_from + '-' + space_to for space_from, space_to in pv)),
+                      file=output)
+
+            # nothing deeper can change a forced checkmate
+            if abs(score) >= MATE_BOUND:
+                break
+
+        return result
+
+
+def score_to_string(score):
+    """
+    converts a score to text, showing checkmates as the number of moves to mate
+    :param score: score from Engine.search
+    :return: string such as '150', '-30', 'mate 3' or '-mate 2'
+    """
+    if score >= MATE_BOUND:
+        return 'mate %d' % ((MATE_SCORE - score + 1) // 2)
+    if score <= -MATE_BOUND:
+        return '-mate %d' % ((MATE_SCORE + score) // 2)
+    return str(score)
+
+
+def best_move(game, time_limit=None, node_limit=None, max_depth=None, book=None):
+    """
+    finds the best move for the player whose turn it is
+    :param game: the JanggiGame to search
+    :param time_limit: optional, the most seconds to search for
+    :param node_limit: optional, the most positions to search
+    :param max_depth: optional, the deepest iteration to search
+    :param book: optional, an OpeningBook to probe before searching
+    :return: tuple containing the best move, its score and the principal variation, see
+             Engine.search
+    """
+    return Engine(game, time_limit, node_limit, max_depth, book).search()
+
+
+def main():
+    """
+    plays the engine against itself from the standard setup, optionally taking the seconds per
+    move, the number of moves and an opening book file as arguments
+    """
+    time_limit = 1.0
+    moves = 10
+    book = None
+    if len(sys.argv) > 1:
+        time_limit = float(sys.argv[1])
+    if len(sys.argv) > 2:
+        moves = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        book = OpeningBook(sys.argv[3])
+
+    game = JanggiGame()
+    engine = Engine(game, time_limit, book=book)
+    for i in range(moves):
+        print('%s to move' % game.player(game.get_turn()))
+        result = engine.search(sys.stdout)
+        if result is None:
+            break
+        game.make_move(result[0][0], result[0][1])
+        print(game)
+        print()
+    print(game.get_game_state())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Benchmark for checkmate detection. Plays seeded random games and times the
+#              checkmate detection that runs after every move, comparing check_for_mate against
+#              the exhaustive check_for_mate_exhaustive it replaced, plus a set of positions where
+#              the side to move is in check or checkmated.
+
+import random
+import sys
+import time
+
+from JanggiGame import JanggiGame
+from positions import CHECK_POSITIONS
+
+
+def random_game(seed, max_moves):
+    """
+    plays a random game from the standard setup, preferring captures so the game reaches checks
+    :param seed: seed for the random choices
+    :param max_moves: the most moves to play
+    :return: list of (space from, space to) moves that were played
+    """
+    rng = random.Random(seed)
+    game = JanggiGame()
+    moves = []
+    while len(moves) < max_moves and game.get_game_state() == 'UNFINISHED':
+        legal = [move for move in game.legal_moves() if move[0] != move[1]]
+        if not legal:
+            legal = game.legal_moves()
+        captures = [move for move in legal if game.get_piece_on(move[1]) is not None]
+        if captures and rng.random() < 0.7:
+            move = rng.choice(captures)
+        else:
+            move = rng.choice(legal)
+        game.make_move(move[0], move[1])
+        moves.append(move)
+    return moves
+
+
+def time_detector(game, detector, repeats):
+    """
+    times a checkmate detector on the player whose turn it is
+    :param game: the JanggiGame to test
+    :param detector: name of the JanggiGame method, e.g. 'check_for_mate'
+    :param repeats: number of times to call the detector
+    :return: tuple containing the result and the average seconds per call
+    """
+    method = getattr(game, detector)
+    start = time.perf_counter()
+    for i in range(repeats):
+        result = method(game.get_turn())
+    return result, (time.perf_counter() - start) / repeats
+
+
+def benchmark_games(games, max_moves, repeats):
+    """
+    replays random games and times both detectors after every move
+    :param games: number of random games to play
+    :param max_moves: the most moves to play in each game
+    :param repeats: number of times to call each detector after each move
+    :return: dictionary mapping 'all' and 'check' to a list containing the number of moves and the
+             total seconds for check_for_mate and check_for_mate_exhaustive, for all moves and
+             for only the moves that left the other player in check
+    """
+    totals = {'all': [0, 0, 0], 'check': [0, 0, 0]}
+    for seed in range(games):
+        game = JanggiGame()
+        for space_from, space_to in random_game(seed, max_moves):
+            game.push_move(space_from, space_to)
+            new_time = time_detector(game, 'check_for_mate', repeats)[1]
+            old_time = time_detector(game, 'check_for_mate_exhaustive', repeats)[1]
+
+            kinds = ['all']
+            if game.is_in_check(game.player(game.get_turn())):
+                kinds.append('check')
+            for kind in kinds:
+                totals[kind][0] += 1
+                totals[kind][1] += new_time
+                totals[kind][2] += old_time
+    return totals
+
+
+def main():
+    """runs the benchmark, optionally taking the number of games to play as an argument"""
+    games = 10
+    if len(sys.argv) > 1:
+        games = int(sys.argv[1])
+
+    print('Checkmate detection after every move of %d random games' % games)
+    totals = benchmark_games(games, 120, 3)
+    for kind, label in ('all', 'all moves'), ('check', 'moves giving check'):
+        moves, new_total, old_total = totals[kind]
+        if moves:
+            print('  %s (%d)' % (label, moves))
+            print('    check_for_mate_exhaustive: %8.1f us per move' % (old_total / moves * 1e6))
+            print('    check_for_mate:            %8.1f us per move' % (new_total / moves * 1e6))
+
+    print('\nPositions with red in check')
+    print('  %-8s %-8s %14s %14s' % ('position', 'mate', 'exhaustive us', 'fast us'))
+    for i, setup in enumerate(CHECK_POSITIONS):
+        game = JanggiGame(setup)
+        game.switch_turn()
+        old_result, old_time = time_detector(game, 'check_for_mate_exhaustive', 20)
+        new_result, new_time = time_detector(game, 'check_for_mate', 20)
+        mate = str(new_result)
+        # the exhaustive detector misses some mates where the general moves along the checking line
+        if old_result != new_result:
+            mate += '*'
+        print('  %-8d %-8s %14.1f %14.1f' % (i + 1, mate, old_time * 1e6, new_time * 1e6))
+    print('\n* check_for_mate_exhaustive gives a different result')
+
+
+if __name__ == '__main__':
+    main()
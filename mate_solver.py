@@ -0,0 +1,225 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Finds forced checkmates. solve_mate searches for the shortest checkmate in at most
+#              n moves of the player whose turn it is, splitting the first moves across a pool of
+#              worker processes. Workers are sent the position in the compact form from
+#              JanggiGame.to_bytes instead of pickled Piece objects. Run as a script to time a set
+#              of puzzles with one worker and with several.
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from JanggiGame import JanggiGame
+from JanggiGame import SPACE_NAMES
+
+
+# positions where the player to move can force checkmate, with True if that is blue, and the
+# number of moves it takes
+PUZZLES = [(['   s g   ',
+             '         ',
+             '    k    ',
+             '         ',
+             '   R     ',
+             '      R  ',
+             '         ',
+             '         ',
+             '         ',
+             '     K   '], True, 2),
+           (['         ',
+             '         ',
+             '   k     ',
+             '      H  ',
+             '      H  ',
+             '     g   ',
+             '         ',
+             '   KcR   ',
+             '   h     ',
+             '         '], True, 3),
+           (['         ',
+             '   k   c ',
+             '         ',
+             '         ',
+             '   s     ',
+             '         ',
+             '         ',
+             '         ',
+             ' R    H  ',
+             '  CRK h  '], True, 3),
+           (['     k   ',
+             '         ',
+             '         ',
+             '     S  g',
+             '       R ',
+             '         ',
+             '     e   ',
+             'C  K     ',
+             '         ',
+             '     R   '], True, 3)]
+
+
+def pack_game(game):
+    """
+    creates the compact form of a game sent to worker processes
+    :param game: the JanggiGame to pack
+    :return: bytes object from JanggiGame.to_bytes
+    """
+    return game.to_bytes()
+
+
+def unpack_game(state):
+    """
+    creates a game from the compact form made by pack_game
+    :param state: bytes object from JanggiGame.to_bytes
+    :return: JanggiGame object in the packed position
+    """
+    return JanggiGame.from_bytes(state)
+
+
+def find_mate(game, n):
+    """
+    looks for a way for the player whose turn it is to checkmate in at most n moves however the
+    other player answers - passing is never tried for the attacking player, since the other
+    player could pass back
+    :param game: the JanggiGame to search, which is left unchanged
+    :param n: the most moves the attacking player can make
+    :return: list of (square from, square to) moves ending in checkmate, where the other player
+             answers with the move that holds out the longest, or None if there is no such mate
+    """
+    attacker = game.get_turn()
+    for square_from, square_to in list(game.iter_legal_squares(attacker)):
+        if square_from == square_to:
+            continue
+        line = mate_after(game, square_from, square_to, n)
+        if line is not None:
+            return line
+    return None
+
+
+def mate_after(game, square_from, square_to, n):
+    """
+    checks if a move of the player whose turn it is forces checkmate within n moves
+    :param game: the JanggiGame to search, which is left unchanged
+    :param square_from: square index of the piece to move
+    :param square_to: square index to move it to
+    :param n: the most moves the attacking player can make, including this one
+    :return: list of moves starting with the given one and ending in checkmate, or None
+    """
+    game.push_square_move(square_from, square_to)
+    defender = game.get_turn()
+    try:
+        replies = list(game.iter_legal_squares(defender))
+
+        # no legal moves means the other player is in check and cannot get out of it
+        if not replies:
+            return [(square_from, square_to)]
+        if n == 1:
+            return None
+
+        # every answer has to lose, and the one that loses last shows the whole line
+        longest = None
+        for reply_from, reply_to in replies:
+            game.push_square_move(reply_from, reply_to)
+            try:
+                line = find_mate(game, n - 1)
+            finally:
+                game.pop_move()
+            if line is None:
+                return None
+            if longest is None or len(line) + 1 > len(longest):
+                longest = [(reply_from, reply_to)] + line
+        return [(square_from, square_to)] + longest
+    finally:
+        game.pop_move()
+
+
+def solve_move(state, move, n):
+    """
+    checks a single first move in a worker process
+    :param state: the position packed by pack_game
+    :param move: tuple containing the square indices of the first move
+    :param n: the most moves the attacking player can make
+    :return: list of moves ending in checkmate, or None
+    """
+    return mate_after(unpack_game(state), move[0], move[1], n)
+
+
+def solve_mate(game, n, workers=None):
+    """
+    finds the shortest forced checkmate of at most n moves for the player whose turn it is - each
+    length from 1 to n is tried in turn, with the first moves split across worker processes
+    :param game: the JanggiGame to search, which is left unchanged
+    :param n: the most moves the attacking player can make
+    :param workers: optional, number of worker processes, defaults to the number of processors -
+                    1 searches in this process without starting a pool
+    :return: list of (space from, space to) moves ending in checkmate, with a pass given as the
+             general's space twice, or None if there is no checkmate in n moves
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    moves = [move for move in game.iter_legal_squares(game.get_turn()) if move[0] != move[1]]
+
+    line = None
+    if workers == 1:
+        for length in range(1, n + 1):
+            line = find_mate(game, length)
+            if line is not None:
+                break
+    else:
+        state = pack_game(game)
+        with ProcessPoolExecutor(workers) as pool:
+            for length in range(1, n + 1):
+                futures = [pool.submit(solve_move, state, move, length) for move in moves]
+
+                # the first move in generation order that mates wins, as with one worker, and
+                # the moves not started yet are dropped
+                for future in futures:
+                    line = future.result()
+                    if line is not None:
+                        break
+                if line is not None:
+                    for future in futures:
+                        future.cancel()
+                    break
+
+    if line is None:
+        return None
+    return [(SPACE_NAMES[square_from], SPACE_NAMES[square_to]) for square_from, square_to in line]
+
+
+def main():
+    """
+    times the puzzles with one worker and with more, optionally taking the number of workers as
+    an argument
+    """
+    workers = os.cpu_count() or 1
+    if len(sys.argv) > 1:
+        workers = int(sys.argv[1])
+
+    print('%-7s %4s %10s %10s %8s  %s' % ('puzzle', 'n', '1 worker', '%d workers' % workers,
+                                          'speedup', 'line'))
+    for i, (setup, turn, n) in enumerate(PUZZLES):
+        game = JanggiGame(setup)
+        if game.get_turn() != turn:
+            game.switch_turn()
+
+        start = time.perf_counter()
+        line = solve_mate(game, n, 1)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel_line = solve_mate(game, n, workers)
+        parallel = time.perf_counter() - start
+
+        if parallel_line != line:
+            print('puzzle %d: %d workers found a different line' % (i + 1, workers))
+        text = ' '.join(space_from + '-' + space_to for space_from, space_to in line or [])
+        print('%-7d %4d %9.2fs %9.2fs %7.2fx  %s' % (i + 1, n, single, parallel,
+                                                      single / parallel, text))
+    if workers > os.cpu_count():
+        print('\nonly %d processors, so more workers cannot be faster' % os.cpu_count())
+
+
+if __name__ == '__main__':
+    main()
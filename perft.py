@@ -0,0 +1,448 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Perft benchmark and move generation correctness suite. Counts every sequence of
+#              legal moves to a given depth from the standard setup, the other back line setups
+#              accepted by UI.get_setup and a set of tactical positions, reporting node counts,
+#              nodes per second and how many of the final moves were captures, checks, passes and
+#              checkmates. The --verify option compares the counts against known values, a slow
+#              reference move generator and the other board backends.
+
+import argparse
+import time
+
+from JanggiGame import JanggiGame
+from JanggiGame import PASS_MOVE
+from positions import CHECK_POSITIONS
+from UI import UI
+
+
+# kinds of final moves counted by perft
+STATS = ('captures', 'checks', 'passes', 'mates')
+
+
+def back_line_positions():
+    """
+    creates the positions with the back line setups accepted by UI.get_setup other than the
+    standard one, named by the order of the horse and elephant on each side of the general for
+    red and then blue, e.g. the standard setup is eheh-eheh
+    :return: dictionary mapping the name of a position to a tuple containing the board setup and
+             True since blue moves first
+    """
+    positions = {}
+    for red in UI.back_lines():
+        for blue in UI.back_lines():
+            name = red[1:3] + red[6:8] + '-' + blue[1:3] + blue[6:8]
+            if name != 'eheh-eheh':
+                positions[name] = (UI.build_setup(red, blue), True)
+    return positions
+
+
+def tactical_positions():
+    """
+    creates positions with checks, checkmates and pieces using the palace diagonals
+    :return: dictionary mapping the name of a position to a tuple containing the board setup and
+             True if blue moves first or False if red does
+    """
+    positions = {}
+
+    # red is in check in each of these, and checkmated in the first four
+    for i, setup in enumerate(CHECK_POSITIONS):
+        positions['check-%d' % (i + 1)] = (setup, False)
+
+    # blue can only pass, from JanggiGame.main
+    positions['palace'] = (['         ',
+                            '    k    ',
+                            '     c  e',
+                            '         ',
+                            '         ',
+                            '     s   ',
+                            '         ',
+                            '  r      ',
+                            '  s K    ',
+                            '        r'], True)
+
+    # chariots and cannons using the palace diagonals with both generals exposed
+    positions['diagonals'] = (['   k  c  ',
+                               '    r    ',
+                               '   g g   ',
+                               'h       s',
+                               '   S     ',
+                               '     s   ',
+                               'c   E    ',
+                               '   G  R  ',
+                               '    K    ',
+                               '  R  C H '], True)
+
+    # the middle game after trading pieces in the centre
+    positions['middle'] = (['r  g ge r',
+                            '    k  h ',
+                            ' c e   c ',
+                            's   s s s',
+                            '  s      ',
+                            '  S    H ',
+                            'S   S   S',
+                            ' C   E C ',
+                            '    K    ',
+                            'R  G GEHR'], False)
+    return positions
+
+
+# positions searched by default, the standard setup uses None
+DEFAULT_POSITIONS = {'start': (None, True)}
+DEFAULT_POSITIONS.update(tactical_positions())
+# every position, including the other back line setups
+POSITIONS = dict(DEFAULT_POSITIONS)
+POSITIONS.update(back_line_positions())
+
+
+# node counts for depths 1, 2 and 3 of some of the positions, checked by --verify - these were
+# checked against the original make_move and is_in_check, which tried every move on a new board
+EXPECTED = {'start': (32, 1024, 33506),
+            'ehhe-heeh': (32, 1024, 33348),
+            'check-1': (0, 0, 0),
+            'check-5': (3, 108, 3333),
+            'palace': (1, 51, 85),
+            'diagonals': (46, 1871, 83967),
+            'middle': (40, 1753, 69005)}
+
+
+def new_game(name, bitboard=False, attack_map=False):
+    """
+    creates a game in one of the named positions
+    :param name: name of the position in POSITIONS
+    :param bitboard: optional, True to use the BitBoard backend
+    :param attack_map: optional, True to keep an AttackMap up to date
+    :return: JanggiGame object with the position set up and the right player to move
+    """
+    setup, turn = POSITIONS[name]
+    game = JanggiGame(setup, bitboard=bitboard, attack_map=attack_map)
+    if game.get_turn() != turn:
+        game.switch_turn()
+    return game
+
+
+def perft(game, depth, stats=None):
+    """
+    counts the sequences of legal moves of the given length, including passes
+    :param game: the JanggiGame to search, which is left unchanged
+    :param depth: number of moves in each sequence
+    :param stats: optional, dictionary with the keys in STATS that the number of final moves of
+                  each kind is added to - finding checks and checkmates makes perft slower
+    :return: number of sequences
+    """
+    if depth == 0:
+        return 1
+
+    moves = game.legal_move_codes()
+    if depth == 1 and stats is None:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        if depth > 1:
+            game.push_move_code(move)
+            nodes += perft(game, depth - 1, stats)
+            game.pop_move()
+            continue
+
+        # count the kind of the final move
+        if move == PASS_MOVE:
+            stats['passes'] += 1
+        elif game.get_piece_at(move % 90) is not None:
+            stats['captures'] += 1
+
+        game.push_move_code(move)
+        turn = game.get_turn()
+        if game.is_in_check(game.player(turn)):
+            stats['checks'] += 1
+            if game.check_for_mate(turn):
+                stats['mates'] += 1
+        game.pop_move()
+        nodes += 1
+
+    return nodes
+
+
+def divide(game, depth):
+    """
+    counts the sequences of legal moves of the given length separately for each first move,
+    which narrows down where two move generators disagree
+    :param game: the JanggiGame to search, which is left unchanged
+    :param depth: number of moves in each sequence, at least 1
+    :return: dictionary mapping (space from, space to) of each first move to its number of
+             sequences
+    """
+    counts = {}
+    for space_from, space_to in game.legal_moves():
+        game.push_move(space_from, space_to)
+        counts[(space_from, space_to)] = perft(game, depth - 1)
+        game.pop_move()
+    return counts
+
+
+def reference_moves(game):
+    """
+    finds the legal moves of the player whose turn it is the slow way, by trying every possible
+    move on the board and looking for the general among all squares attacked by the other player
+    :param game: the JanggiGame to search, which is left unchanged
+    :return: list of (square from, square to) tuples, with a pass given as the general's square
+             twice
+    """
+    player = game.get_turn()
+    moves = []
+    for piece in game.get_pieces(player):
+        square_from = piece.get_square()
+        for square_to in list(game.generate_moves(piece)):
+            game.push_square_move(square_from, square_to)
+            attacked = game.squares_under_attack(game.get_pieces(not player))
+            if game.get_general(player).get_square() not in attacked:
+                moves.append((square_from, square_to))
+            game.pop_move()
+
+    general_square = game.get_general(player).get_square()
+    if general_square not in game.squares_under_attack(game.get_pieces(not player)):
+        moves.append((general_square, general_square))
+    return moves
+
+
+def reference_perft(game, depth):
+    """
+    same as perft without stats, but using reference_moves
+    :param game: the JanggiGame to search, which is left unchanged
+    :param depth: number of moves in each sequence
+    :return: number of sequences
+    """
+    if depth == 0:
+        return 1
+    moves = reference_moves(game)
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for square_from, square_to in moves:
+        game.push_square_move(square_from, square_to)
+        nodes += reference_perft(game, depth - 1)
+        game.pop_move()
+    return nodes
+
+
+def same_as_rebuilt(game):
+    """
+    compares a game with a new game made from its compact form, which catches pieces that are
+    still listed after leaving the board or that moved on another board
+    :param game: the JanggiGame to compare
+    :return: True if both games have the same pieces and legal moves, False otherwise
+    """
+    rebuilt = JanggiGame.from_bytes(game.to_bytes())
+    for player in (False, True):
+        if sorted(game.legal_moves(player)) != sorted(rebuilt.legal_moves(player)):
+            return False
+        squares = sorted(piece.get_square() for piece in game.get_pieces(player))
+        if squares != sorted(piece.get_square() for piece in rebuilt.get_pieces(player)):
+            return False
+    return True
+
+
+def verify_clones(game):
+    """
+    makes a copy-on-write clone after each first move and checks that a move made and undone on
+    either board, followed by undoing the first move on the original, leaves both boards right,
+    whichever board changes first
+    :param game: the JanggiGame to start from, which is left unchanged
+    :return: True if both boards stay right every time, False otherwise
+    """
+    start = game.to_bytes()
+    for square_from, square_to in list(game.iter_legal_squares(game.get_turn())):
+        for original_first in True, False:
+            game.push_square_move(square_from, square_to)
+            position = game.to_bytes()
+            clone = game.clone(copy_on_write=True)
+            if original_first:
+                boards = game, clone
+            else:
+                boards = clone, game
+            for board in boards:
+                for reply in list(board.iter_legal_squares(board.get_turn()))[:1]:
+                    board.push_square_move(reply[0], reply[1])
+                    board.pop_move()
+            game.pop_move()
+
+            if game.to_bytes() != start or clone.to_bytes() != position \
+                    or not same_as_rebuilt(game) or not same_as_rebuilt(clone):
+                return False
+    return True
+
+
+def verify_clone_undo(game, length=4):
+    """
+    plays a line of moves after each first move, taking a piece whenever it can, then makes a
+    copy-on-write clone and undoes the whole line on the original - the records of the earlier
+    moves must still point at the original's pieces after the clone has shared them
+    :param game: the JanggiGame to start from, which is left unchanged
+    :param length: optional, the number of moves in each line, including the first move
+    :return: True if the original gets back to the start and the clone keeps the position at the
+             end of the line every time, False otherwise
+    """
+    start = game.to_bytes()
+    for first in list(game.iter_legal_squares(game.get_turn())):
+        game.push_square_move(first[0], first[1])
+        played = 1
+        while played < length:
+            moves = list(game.iter_legal_squares(game.get_turn()))
+            if not moves:
+                break
+            captures = [move for move in moves if game.get_piece_at(move[1]) is not None]
+            move = (captures or moves)[0]
+            game.push_square_move(move[0], move[1])
+            played += 1
+
+        position = game.to_bytes()
+        clone = game.clone(copy_on_write=True)
+        for _ in range(played):
+            game.pop_move()
+
+        if game.to_bytes() != start or clone.to_bytes() != position \
+                or not same_as_rebuilt(game) or not same_as_rebuilt(clone):
+            return False
+    return True
+
+
+def run(names, depth, bitboard=False, attack_map=False, counts=True):
+    """
+    runs perft on each position for every depth up to the given one and prints the results
+    :param names: names of the positions in POSITIONS
+    :param depth: the deepest depth to search
+    :param bitboard: optional, True to use the BitBoard backend
+    :param attack_map: optional, True to keep an AttackMap up to date
+    :param counts: optional, False to skip counting the kinds of final moves for a faster run
+    :return: tuple containing the total nodes and the total seconds
+    """
+    total_nodes = 0
+    total_time = 0
+    print('%-10s %5s %10s %9s %9s %9s %7s %8s %10s' % ('position', 'depth', 'nodes', 'captures',
+                                                       'checks', 'passes', 'mates', 'seconds',
+                                                       'nodes/sec'))
+    for name in names:
+        game = new_game(name, bitboard, attack_map)
+        for current in range(1, depth + 1):
+            stats = None
+            if counts:
+                stats = dict.fromkeys(STATS, 0)
+            start = time.perf_counter()
+            nodes = perft(game, current, stats)
+            seconds = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += seconds
+
+            line = '%-10s %5d %10d' % (name, current, nodes)
+            if counts:
+                line += ' %9d %9d %9d %7d' % tuple(stats[kind] for kind in STATS)
+            else:
+                line += ' %9s %9s %9s %7s' % ('-', '-', '-', '-')
+            line += ' %8.2f %10.0f' % (seconds, nodes / max(seconds, 1e-9))
+            print(line)
+    return total_nodes, total_time
+
+
+def verify(names, depth):
+    """
+    compares perft against the known node counts, reference_perft and every board backend, and
+    checks copy-on-write clones with every backend, see verify_clones and verify_clone_undo
+    :param names: names of the positions in POSITIONS
+    :param depth: the deepest depth to compare
+    :return: True if every count matches, False otherwise
+    """
+    backends = (('board', False, False), ('bitboard', True, False),
+                ('attack map', False, True), ('bitboard with attack map', True, True))
+    matches = True
+    for name in names:
+        failures = 0
+        for current in range(1, depth + 1):
+            expected = reference_perft(new_game(name), current)
+            known = EXPECTED.get(name, ())
+            if current <= len(known) and known[current - 1] != expected:
+                print('%s depth %d: reference gives %d, expected %d'
+                      % (name, current, expected, known[current - 1]))
+                failures += 1
+
+            for label, bitboard, attack_map in backends:
+                nodes = perft(new_game(name, bitboard, attack_map), current)
+                if nodes != expected:
+                    print('%s depth %d: %s gives %d, reference gives %d'
+                          % (name, current, label, nodes, expected))
+                    failures += 1
+
+        for label, bitboard, attack_map in backends:
+            if not verify_clones(new_game(name, bitboard, attack_map)):
+                print('%s: %s clones do not stay separate' % (name, label))
+                failures += 1
+            if not verify_clone_undo(new_game(name, bitboard, attack_map)):
+                print('%s: %s moves made before cloning are not undone' % (name, label))
+                failures += 1
+
+        if failures:
+            print('%-10s FAILED' % name)
+            matches = False
+        else:
+            print('%-10s ok' % name)
+    return matches
+
+
+def main():
+    """runs perft from the command line, use --help for the options"""
+    parser = argparse.ArgumentParser(description='Counts the legal move sequences of Janggi '
+                                                 'positions to measure move generation.')
+    parser.add_argument('depth', nargs='?', type=int, default=3,
+                        help='the deepest depth to search (default 3)')
+    parser.add_argument('-p', '--position', action='append', choices=sorted(POSITIONS),
+                        metavar='NAME', help='position to search, can be repeated (default: '
+                                             'start and the tactical positions)')
+    parser.add_argument('-a', '--all', action='store_true',
+                        help='search every position, including the other back line setups')
+    parser.add_argument('-l', '--list', action='store_true', help='list the positions and exit')
+    parser.add_argument('--bitboard', action='store_true', help='use the BitBoard backend')
+    parser.add_argument('--attack-map', action='store_true', help='keep an AttackMap up to date')
+    parser.add_argument('--fast', action='store_true',
+                        help='only count nodes, without captures, checks, passes and mates')
+    parser.add_argument('--divide', action='store_true',
+                        help='print the node count below each first move')
+    parser.add_argument('--verify', action='store_true',
+                        help='compare the counts against the known values, a reference move '
+                             'generator and every board backend, and check copy-on-write clones')
+    args = parser.parse_args()
+
+    if args.list:
+        for name in POSITIONS:
+            print(name)
+        return
+
+    if args.position:
+        names = args.position
+    elif args.all:
+        names = list(POSITIONS)
+    else:
+        names = list(DEFAULT_POSITIONS)
+
+    if args.verify:
+        if not verify(names, args.depth):
+            raise SystemExit(1)
+        return
+
+    if args.divide:
+        for name in names:
+            game = new_game(name, args.bitboard, args.attack_map)
+            counts = divide(game, args.depth)
+            print(name)
+            for (space_from, space_to), nodes in sorted(counts.items()):
+                print('  %-4s %-4s %d' % (space_from, space_to, nodes))
+            print('  total     %d' % sum(counts.values()))
+        return
+
+    total_nodes, total_time = run(names, args.depth, args.bitboard, args.attack_map,
+                                  not args.fast)
+    print('\n%d nodes in %.2f seconds, %.0f nodes/sec'
+          % (total_nodes, total_time, total_nodes / max(total_time, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
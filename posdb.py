@@ -0,0 +1,317 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Position database for asking how often a position occurs in a set of games and how
+#              those games ended. Games from record files are replayed and every position is
+#              counted by its Zobrist key from JanggiGame.position_key. The counts are written to a
+#              file of fixed size entries sorted by key, which is memory-mapped and searched with a
+#              binary search when queried, so the file is never read into memory as a whole.
+#              Building works on corpora larger than memory by sorting the counts in runs and
+#              merging the runs.
+
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from JanggiGame import GAME_STATES
+from JanggiGame import JanggiGame
+from records import read_records
+
+
+# header of a database file, and of the other files read with MappedFile - magic, format version
+# and number of entries
+DATABASE_MAGIC = b'JPDB'
+DATABASE_FORMAT = 1
+HEADER = struct.Struct('<4sIQ')
+
+# an entry - position key, then the number of times the position occurred in total and in games
+# that ended unfinished, won by red and won by blue
+ENTRY = struct.Struct('<QIIII')
+
+# position of the count of each game state in an entry, after the total
+RESULT_INDEX = {game_state: i for i, game_state in enumerate(GAME_STATES)}
+
+# the most positions counted in memory before they are written out as a sorted run
+RUN_SIZE = 1000000
+
+
+class MappedFile:
+    """
+    MappedFile class reads a file of fixed size entries after a header of magic, format version
+    and number of entries, such as a position database or an opening book. The file is
+    memory-mapped, so opening it is fast whatever its size and only the pages that are read are
+    loaded. Each kind of file sets the class attributes for its magic, format, entry and name
+    with an article for error messages.
+    """
+    _magic = None
+    _format = None
+    _entry = None
+    _name = None
+
+    def __init__(self, path):
+        """
+        init method opens and maps the file and checks its header
+        :param path: name of the file
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            self._file.close()
+            raise ValueError('%s is not %s' % (path, self._name))
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError('%s is not %s' % (path, self._name))
+        magic, version, size = HEADER.unpack_from(self._map, 0)
+        if magic != self._magic or version != self._format \
+                or len(self._map) != HEADER.size + size * self._entry.size:
+            self.close()
+            raise ValueError('%s is not %s' % (path, self._name))
+        self._size = size
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+    def __len__(self):
+        """returns the number of entries in the file"""
+        return self._size
+
+
+    def close(self):
+        """unmaps and closes the file"""
+        self._map.close()
+        self._file.close()
+
+
+class PositionDatabase(MappedFile):
+    """
+    PositionDatabase class looks up positions in a database file made by build_database, with
+    an entry for each different position, using a binary search of the mapped file
+    """
+    _magic = DATABASE_MAGIC
+    _format = DATABASE_FORMAT
+    _entry = ENTRY
+    _name = 'a position database'
+
+    def lookup(self, key):
+        """
+        finds the counts of a position
+        :param key: the position key, from JanggiGame.position_key
+        :return: tuple containing the number of times the position occurred and how many of those
+                 were in games that ended unfinished, won by red and won by blue, or None if the
+                 position is not in the database
+        """
+        data = self._map
+        unpack = ENTRY.unpack_from
+        low = 0
+        high = self._size
+        while low < high:
+            middle = (low + high) // 2
+            entry = unpack(data, HEADER.size + middle * ENTRY.size)
+            if entry[0] < key:
+                low = middle + 1
+            elif entry[0] > key:
+                high = middle
+            else:
+                return entry[1:]
+        return None
+
+
+    def lookup_game(self, game):
+        """
+        finds the counts of the current position of a game
+        :param game: the JanggiGame to look up
+        :return: tuple of counts, see lookup, or None if the position is not in the database
+        """
+        return self.lookup(game.position_key())
+
+
+    def iter_entries(self):
+        """
+        goes through the database in key order
+        :return: generator of (key, total, unfinished, red won, blue won) tuples
+        """
+        for offset in range(HEADER.size, HEADER.size + self._size * ENTRY.size, ENTRY.size):
+            yield ENTRY.unpack_from(self._map, offset)
+
+
+def game_keys(record):
+    """
+    replays a game with make_trusted_move, so the moves are not checked
+    :param record: the GameRecord to replay
+    :return: generator of the key of every position in the game, starting with the start position
+    """
+    game = record.new_game()
+    yield game.position_key()
+    for space_from, space_to in record.get_moves():
+        game.make_trusted_move(space_from, space_to)
+        yield game.position_key()
+
+
+def write_run(entries, directory, entry=ENTRY):
+    """
+    writes entries already sorted by key to a temporary file
+    :param entries: iterable of entry tuples
+    :param directory: directory to create the file in
+    :param entry: optional, struct.Struct of an entry
+    :return: name of the file
+    """
+    descriptor, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(descriptor, 'wb') as run:
+        pack = entry.pack
+        run.write(b''.join(pack(*values) for values in entries))
+    return path
+
+
+def read_run(path, entry=ENTRY):
+    """
+    reads a run written by write_run
+    :param path: name of the file
+    :param entry: optional, struct.Struct of an entry
+    :return: generator of entry tuples in key order
+    """
+    with open(path, 'rb') as run:
+        while True:
+            chunk = run.read(entry.size * 4096)
+            if not chunk:
+                return
+            yield from entry.iter_unpack(chunk)
+
+
+def build_database(sources, path, run_size=RUN_SIZE, progress=None):
+    """
+    counts every position in games from record files and writes the database
+    :param sources: list of record file names, or of file objects, see records.read_records
+    :param path: name of the database file to write
+    :param run_size: optional, the most positions to count in memory before writing a sorted run
+                     to a temporary file
+    :param progress: optional, a file such as sys.stderr to print progress to
+    :return: tuple containing the number of games, the number of positions counted and the number
+             of different positions
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    runs = []
+    counts = {}
+    games = 0
+    positions = 0
+    try:
+        for source in sources:
+            for record in read_records(source):
+                result = RESULT_INDEX[record.get_result()] + 1
+                for key in game_keys(record):
+                    entry = counts.get(key)
+                    if entry is None:
+                        entry = counts[key] = [0, 0, 0, 0]
+                    entry[0] += 1
+                    entry[result] += 1
+                    positions += 1
+
+                games += 1
+                if len(counts) >= run_size:
+                    runs.append(write_run(sorted_counts(counts), directory))
+                    counts = {}
+                if progress is not None and games % 10000 == 0:
+                    print('%d games, %d positions' % (games, positions), file=progress)
+
+        # counts that fit in memory are written straight out, otherwise the runs are merged, adding
+        # up the counts of keys found in more than one
+        if runs:
+            if counts:
+                runs.append(write_run(sorted_counts(counts), directory))
+                counts = {}
+            entries = merge_runs([read_run(run) for run in runs])
+        else:
+            entries = sorted_counts(counts)
+
+        size = 0
+        with open(path, 'wb') as output:
+            output.write(HEADER.pack(DATABASE_MAGIC, DATABASE_FORMAT, 0))
+            pack = ENTRY.pack
+            for entry in entries:
+                output.write(pack(*entry))
+                size += 1
+            output.seek(0)
+            output.write(HEADER.pack(DATABASE_MAGIC, DATABASE_FORMAT, size))
+    finally:
+        for run in runs:
+            os.remove(run)
+
+    return games, positions, size
+
+
+def sorted_counts(counts):
+    """
+    sorts counts by key
+    :param counts: dictionary mapping keys to [total, unfinished, red won, blue won] lists
+    :return: generator of entry tuples in key order
+    """
+    for key in sorted(counts):
+        yield (key,) + tuple(counts[key])
+
+
+def merge_runs(runs, key_size=1):
+    """
+    merges sorted runs into one, adding up the counts of entries with the same key
+    :param runs: list of iterators of entry tuples in key order
+    :param key_size: optional, the number of values at the start of an entry that make up its
+                     key, the rest being counts
+    :return: generator of entry tuples in key order with each key once
+    """
+    current = None
+    for entry in heapq.merge(*runs):
+        if current is not None and tuple(current[:key_size]) == entry[:key_size]:
+            for i in range(key_size, len(entry)):
+                current[i] += entry[i]
+            continue
+        if current is not None:
+            yield tuple(current)
+        current = list(entry)
+    if current is not None:
+        yield tuple(current)
+
+
+def main():
+    """
+    builds a database from the command line as 'posdb.py build DATABASE RECORDS...', or looks up
+    positions given in JanggiGame.to_fen form as 'posdb.py query DATABASE FEN...'
+    """
+    if len(sys.argv) < 3 or sys.argv[1] not in ('build', 'query'):
+        print('usage: posdb.py build DATABASE RECORDS... | posdb.py query DATABASE [FEN...]')
+        sys.exit(2)
+
+    if sys.argv[1] == 'build':
+        start = time.perf_counter()
+        games, positions, size = build_database(sys.argv[3:], sys.argv[2], progress=sys.stderr)
+        seconds = time.perf_counter() - start
+        print('%d games, %d positions, %d different in %.2f seconds'
+              % (games, positions, size, seconds))
+        return
+
+    with PositionDatabase(sys.argv[2]) as database:
+        texts = sys.argv[3:] or [JanggiGame().to_fen()]
+        for text in texts:
+            key = JanggiGame.from_fen(text).position_key()
+            start = time.perf_counter()
+            for i in range(10000):
+                counts = database.lookup(key)
+            micros = (time.perf_counter() - start) * 100
+            if counts is None:
+                print('%s: not found (%.1f us)' % (text, micros))
+            else:
+                print('%s: %d times, unfinished %d, red won %d, blue won %d (%.1f us)'
+                      % ((text,) + counts + (micros,)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Test positions shared by the move generation suite in perft.py and the checkmate
+#              benchmark in mate_benchmark.py, so neither script has to import the other.
+
+
+# positions where red is in check, the first four of them checkmate
+CHECK_POSITIONS = [['   s g   ',
+                    '    R    ',
+                    '    kR   ',
+                    '         ',
+                    '         ',
+                    '      R  ',
+                    '         ',
+                    '         ',
+                    '         ',
+                    '     K   '],
+                   ['   g     ',
+                    'H   Rk   ',
+                    '    hG   ',
+                    '         ',
+                    '        H',
+                    '         ',
+                    '         ',
+                    '         ',
+                    '         ',
+                    '   K     '],
+                   ['    hkR  ',
+                    '  R      ',
+                    '   g  S  ',
+                    '         ',
+                    '      h  ',
+                    '         ',
+                    '         ',
+                    '   K     ',
+                    '         ',
+                    '         '],
+                   ['  G      ',
+                    '    g    ',
+                    '   ks    ',
+                    '        H',
+                    '      R  ',
+                    '   R     ',
+                    '         ',
+                    '    K    ',
+                    '         ',
+                    '         '],
+                   ['rehg gehr',
+                    '    k    ',
+                    ' c  R  c ',
+                    's s s s s',
+                    '         ',
+                    '         ',
+                    'S S S S S',
+                    ' C     C ',
+                    '    K    ',
+                    ' EHG GEHR']]
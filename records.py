@@ -0,0 +1,248 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Game record format for storing finished games. Each record is a header of tags,
+#              one per line, followed by a line with the moves and a blank line, e.g.
+#
+#                  [Start "rehg1gehr/4k4/1c5c1/s1s1s1s1s/9/9/S1S1S1S1S/1C5C1/4K4/REHG1GEHR b -"]
+#                  [Result "BLUE_WON"]
+#                  [Seed "7"]
+#                  c7-c6 a4-a5 e9-e9 ...
+#
+#              Start is the position in JanggiGame.to_fen form and can be left out for the
+#              standard setup, Result is the final game state, and any other tags are kept as they
+#              are. Moves are written as space from and space to, with a pass written as the
+#              general's space twice. Files ending in .gz are compressed with gzip. Records are
+#              read one at a time, so files of any size can be read, and can be replayed either
+#              with full validation or trusting the recorded moves.
+
+import gzip
+import sys
+import time
+
+from JanggiGame import GAME_STATES
+from JanggiGame import JanggiGame
+
+
+# text form of the standard setup
+STANDARD_START = JanggiGame().to_fen()
+
+
+class GameRecord:
+    """
+    GameRecord class contains a single game - the start position, the moves made, the result and
+    any other tags such as the seed or the players
+    """
+
+    def __init__(self, start=None, moves=None, result='UNFINISHED', tags=None):
+        """
+        init method creates a record
+        :param start: optional, the start position in JanggiGame.to_fen form, defaults to the
+                      standard setup
+        :param moves: optional, list of (space from, space to) tuples
+        :param result: optional, the game state at the end of the game
+        :param tags: optional, dictionary of other tags, mapping names to strings
+        """
+        if start is None:
+            start = STANDARD_START
+        if result not in GAME_STATES:
+            raise ValueError('unknown result %r' % result)
+        self._start = start
+        self._moves = list(moves or [])
+        self._result = result
+        self._tags = dict(tags or {})
+
+
+    def get_start(self):
+        """returns the start position in JanggiGame.to_fen form"""
+        return self._start
+
+
+    def get_moves(self):
+        """returns the list of (space from, space to) moves"""
+        return self._moves
+
+
+    def get_result(self):
+        """returns the game state at the end of the game"""
+        return self._result
+
+
+    def set_result(self, result):
+        """sets the game state at the end of the game"""
+        if result not in GAME_STATES:
+            raise ValueError('unknown result %r' % result)
+        self._result = result
+
+
+    def get_tags(self):
+        """returns the dictionary of other tags"""
+        return self._tags
+
+
+    def get_tag(self, name, default=None):
+        """returns the value of another tag, or the default if the record does not have it"""
+        return self._tags.get(name, default)
+
+
+    def add_move(self, space_from, space_to):
+        """adds a move to the end of the game"""
+        self._moves.append((space_from, space_to))
+
+
+    def to_text(self):
+        """
+        creates the text form of the record, ending with a blank line
+        :return: string containing the record
+        """
+        lines = []
+        if self._start != STANDARD_START:
+            lines.append('[Start "%s"]' % self._start)
+        lines.append('[Result "%s"]' % self._result)
+        for name, value in self._tags.items():
+            lines.append('[%s "%s"]' % (name, value))
+        lines.append(' '.join(space_from + '-' + space_to for space_from, space_to in self._moves))
+        return '\n'.join(lines) + '\n\n'
+
+
+    def new_game(self, **options):
+        """
+        creates a game in the start position
+        :param options: optional, keyword arguments for JanggiGame.from_fen, e.g. bitboard=True
+        :return: JanggiGame object
+        """
+        return JanggiGame.from_fen(self._start, **options)
+
+
+    def replay(self, trusted=False, **options):
+        """
+        plays the recorded moves from the start position
+        :param trusted: optional, True to apply the moves with make_trusted_move, which skips
+                        validation and looking for check and checkmate and takes the game state
+                        from the result, for records that are known to be correct
+        :param options: optional, keyword arguments for JanggiGame.from_fen, e.g. bitboard=True
+        :return: JanggiGame object at the end of the game
+        """
+        if not trusted:
+            # the game state is only checked at the end, so checkmate is not looked for on every
+            # move - a move after checkmate still fails as there are no legal moves left
+            options.setdefault('lazy_state', True)
+        game = self.new_game(**options)
+        if trusted:
+            for space_from, space_to in self._moves:
+                game.make_trusted_move(space_from, space_to)
+            game.set_game_state(self._result)
+            return game
+
+        for number, (space_from, space_to) in enumerate(self._moves):
+            if not game.make_move(space_from, space_to):
+                raise ValueError('move %d, %s to %s, is not legal' % (number + 1, space_from,
+                                                                       space_to))
+        if game.get_game_state() != self._result:
+            raise ValueError('the game ends %s, not %s' % (game.get_game_state(), self._result))
+        return game
+
+
+def open_records(path, mode='r'):
+    """
+    opens a file of records as text, compressed with gzip if the name ends in .gz
+    :param path: name of the file
+    :param mode: optional, 'r' to read, 'w' to write or 'a' to append
+    :return: file object
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='ascii')
+    return open(path, mode, encoding='ascii')
+
+
+def write_record(output, record):
+    """
+    writes a record to a file
+    :param output: file object opened for writing text, e.g. with open_records
+    :param record: the GameRecord to write
+    """
+    output.write(record.to_text())
+
+
+def read_records(source):
+    """
+    reads records one at a time, without reading the whole file first
+    :param source: name of the file, or a file object opened for reading text
+    :return: generator of GameRecord objects
+    """
+    if isinstance(source, str):
+        with open_records(source) as file:
+            yield from read_records(file)
+        return
+
+    tags = {}
+    moves = None
+    for number, line in enumerate(source):
+        line = line.strip()
+
+        # a blank line ends a record
+        if not line:
+            if tags or moves is not None:
+                yield parse_record(tags, moves or '')
+                tags = {}
+                moves = None
+            continue
+
+        if line.startswith('['):
+            if moves is not None or not line.endswith('"]') or ' "' not in line:
+                raise ValueError('line %d: unexpected tag %r' % (number + 1, line))
+            name, value = line[1:-2].split(' "', 1)
+            tags[name] = value
+        elif moves is None:
+            moves = line
+        else:
+            moves += ' ' + line
+
+    if tags or moves is not None:
+        yield parse_record(tags, moves or '')
+
+
+def parse_record(tags, moves):
+    """
+    creates a record from the tags and moves read from a file
+    :param tags: dictionary of every tag, including Start and Result
+    :param moves: string with the moves separated by spaces
+    :return: GameRecord object
+    """
+    tags = dict(tags)
+    start = tags.pop('Start', None)
+    result = tags.pop('Result', 'UNFINISHED')
+    move_list = []
+    for move in moves.split():
+        space_from, dash, space_to = move.partition('-')
+        if not dash:
+            raise ValueError('move %r is not written as space from-space to' % move)
+        move_list.append((space_from, space_to))
+    return GameRecord(start, move_list, result, tags)
+
+
+def main():
+    """
+    replays every game in the files given as arguments with and without validation, reporting
+    how long each takes - the records are read one at a time, so files of any size can be timed
+    """
+    for path in sys.argv[1:]:
+        games = 0
+        moves = 0
+        seconds = {False: 0.0, True: 0.0}
+        for record in read_records(path):
+            games += 1
+            moves += len(record.get_moves())
+            for trusted in False, True:
+                start = time.perf_counter()
+                record.replay(trusted)
+                seconds[trusted] += time.perf_counter() - start
+
+        print('%s: %d games, %d moves' % (path, games, moves))
+        for trusted in False, True:
+            print('  %-9s %8.2f seconds %10.0f moves/sec'
+                  % ('trusted' if trusted else 'validated', seconds[trusted],
+                     moves / max(seconds[trusted], 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
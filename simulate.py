@@ -0,0 +1,202 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Batch self-play runner. Plays many games from the standard setup or the back line
+#              setups accepted by UI.get_setup across a pool of worker processes, with a move
+#              policy for each player and a seed for each game so any game can be played again.
+#              Finished games are written to a file in the records format as soon as they complete,
+#              and the number of games and moves per second is reported at the end.
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+
+from JanggiGame import JanggiGame
+from engine import Engine
+from records import GameRecord
+from records import open_records
+from records import write_record
+from UI import UI
+
+
+# the standard back line, used for both players unless the setups are varied
+STANDARD_BACK_LINE = 'rehg gehr'
+
+
+def random_policy(game, rng, nodes):
+    """
+    picks any legal move other than passing, which is only chosen when there is nothing else
+    :param game: the JanggiGame to move in
+    :param rng: random.Random object for the choice
+    :param nodes: not used
+    :return: tuple containing the space moved from and to
+    """
+    moves = game.legal_moves()
+    piece_moves = [move for move in moves if move[0] != move[1]]
+    return rng.choice(piece_moves or moves)
+
+
+def capture_policy(game, rng, nodes):
+    """
+    picks a capture most of the time when there is one, otherwise any legal move other than
+    passing, so games reach checks and checkmates sooner than with random_policy
+    :param game: the JanggiGame to move in
+    :param rng: random.Random object for the choice
+    :param nodes: not used
+    :return: tuple containing the space moved from and to
+    """
+    moves = [move for move in game.legal_moves() if move[0] != move[1]]
+    captures = [move for move in moves if game.get_piece_on(move[1]) is not None]
+    if captures and rng.random() < 0.7:
+        return rng.choice(captures)
+    if moves:
+        return rng.choice(moves)
+    return random_policy(game, rng, nodes)
+
+
+def engine_policy(game, rng, nodes):
+    """
+    picks the best move found by the engine within a node budget, which keeps games the same for
+    the same seed however fast the machine is
+    :param game: the JanggiGame to move in
+    :param rng: not used
+    :param nodes: the most positions the engine searches for each move
+    :return: tuple containing the space moved from and to
+    """
+    return Engine(game, node_limit=nodes).search()[0]
+
+
+# move policies by name
+POLICIES = {'random': random_policy,
+            'capture': capture_policy,
+            'engine': engine_policy}
+
+
+def play_game(seed, blue_policy, red_policy, variants, max_moves, nodes):
+    """
+    plays a single game, used by the worker processes
+    :param seed: seed for the back line setups and the moves chosen by the policies
+    :param blue_policy: name of blue's policy in POLICIES
+    :param red_policy: name of red's policy in POLICIES
+    :param variants: True to choose random back lines from UI.back_lines, False for the standard
+                     setup
+    :param max_moves: the most moves to play before stopping the game unfinished
+    :param nodes: node budget of the engine policy
+    :return: GameRecord of the game, tagged with the seed, the policies and the back lines of red
+             and blue
+    """
+    rng = random.Random(seed)
+    red = blue = STANDARD_BACK_LINE
+    if variants:
+        red = rng.choice(UI.back_lines())
+        blue = rng.choice(UI.back_lines())
+
+    game = JanggiGame(UI.build_setup(red, blue))
+    record = GameRecord(game.to_fen(), tags={'Seed': str(seed),
+                                             'Blue': blue_policy,
+                                             'Red': red_policy,
+                                             'RedSetup': red,
+                                             'BlueSetup': blue.upper()})
+    policies = {True: POLICIES[blue_policy], False: POLICIES[red_policy]}
+    while len(record.get_moves()) < max_moves and game.get_game_state() == 'UNFINISHED':
+        space_from, space_to = policies[game.get_turn()](game, rng, nodes)
+        if not game.make_move(space_from, space_to):
+            raise ValueError('seed %d: %s to %s was not accepted' % (seed, space_from, space_to))
+        record.add_move(space_from, space_to)
+
+    record.set_result(game.get_game_state())
+    return record
+
+
+def simulate(games, output, blue_policy='random', red_policy='random', variants=False,
+             max_moves=200, nodes=2000, seed=0, workers=None, progress=None):
+    """
+    plays games across worker processes and writes each one to a file as soon as it finishes
+    :param games: number of games to play
+    :param output: an open text file, e.g. from records.open_records, that each game is written to
+                   as a record, in the order the games finish
+    :param blue_policy: optional, name of blue's policy in POLICIES
+    :param red_policy: optional, name of red's policy in POLICIES
+    :param variants: optional, True to choose random back lines for each game
+    :param max_moves: optional, the most moves to play in each game
+    :param nodes: optional, node budget of the engine policy
+    :param seed: optional, seed of the first game, the others use the following seeds
+    :param workers: optional, number of worker processes, defaults to the number of processors -
+                    1 plays the games in this process
+    :param progress: optional, a file such as sys.stderr to print progress to
+    :return: tuple containing the number of games, the number of moves and the seconds taken
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    finished = 0
+    total_moves = 0
+
+    def record(result):
+        nonlocal finished, total_moves
+        write_record(output, result)
+        finished += 1
+        total_moves += len(result.get_moves())
+        if progress is not None and finished % 100 == 0:
+            seconds = time.perf_counter() - start
+            print('%d games, %.1f games/sec, %.0f moves/sec'
+                  % (finished, finished / seconds, total_moves / seconds), file=progress)
+
+    if workers == 1:
+        for index in range(games):
+            record(play_game(seed + index, blue_policy, red_policy, variants, max_moves, nodes))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            # only a few games are waiting at a time, so any number of games can be played
+            pending = set()
+            index = 0
+            while index < games or pending:
+                while index < games and len(pending) < workers * 4:
+                    pending.add(pool.submit(play_game, seed + index, blue_policy, red_policy,
+                                            variants, max_moves, nodes))
+                    index += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+
+    output.flush()
+    return finished, total_moves, time.perf_counter() - start
+
+
+def main():
+    """runs the simulator from the command line, use --help for the options"""
+    parser = argparse.ArgumentParser(description='Plays many Janggi games across processes.')
+    parser.add_argument('games', type=int, help='number of games to play')
+    parser.add_argument('-o', '--output', default='games.rec',
+                        help='file to write the games to, compressed if the name ends in .gz '
+                             '(default games.rec)')
+    parser.add_argument('--blue', choices=sorted(POLICIES), default='random',
+                        help="blue's move policy (default random)")
+    parser.add_argument('--red', choices=sorted(POLICIES), default='random',
+                        help="red's move policy (default random)")
+    parser.add_argument('--variants', action='store_true',
+                        help='choose random back line setups for each game')
+    parser.add_argument('--max-moves', type=int, default=200,
+                        help='the most moves in a game (default 200)')
+    parser.add_argument('--nodes', type=int, default=2000,
+                        help='node budget for each move of the engine policy (default 2000)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game (default 0)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes (default: number of processors)')
+    args = parser.parse_args()
+
+    with open_records(args.output, 'w') as output:
+        games, moves, seconds = simulate(args.games, output, args.blue, args.red, args.variants,
+                                         args.max_moves, args.nodes, args.seed, args.workers,
+                                         sys.stderr)
+    print('%d games, %d moves in %.2f seconds' % (games, moves, seconds))
+    print('%.2f games/sec, %.0f moves/sec' % (games / seconds, moves / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,488 @@
+# Author: agent
+# Date: 10/17/2026
+# Description: Endgame tablebases for positions with only a few pieces. Each material signature,
+#              such as KR-kgg for a blue general and chariot against a red general and two guards,
+#              is solved by retrograde analysis - every position is visited once to find its legal
+#              moves with JanggiGame.iter_legal_squares, so the palace, blocking and cannon rules
+#              are the same as in play, and the results are then spread backwards from the
+#              checkmates. Captures lead into the signatures with one piece fewer, which are solved
+#              first, and the signatures with the same number of pieces are solved in parallel
+#              across worker processes. Each signature is saved as a file with one byte for each
+#              position, and probing a position gives whether the player to move wins, loses or
+#              draws and how many moves it takes to checkmate.
+
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from JanggiGame import BLUE_PALACE
+from JanggiGame import GENERAL
+from JanggiGame import JanggiGame
+from JanggiGame import PIECE_TYPES
+from JanggiGame import PieceType
+from JanggiGame import POSITION_FORMAT
+from JanggiGame import POSITION_SIZE
+from JanggiGame import RED_PALACE
+
+
+# results of a position for the player whose turn it is
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# file name extension of a tablebase
+TABLEBASE_EXTENSION = '.jtb'
+
+# each position is stored as 0 for a draw or an impossible position, otherwise the number of moves
+# left until checkmate, counting both players, plus one - an odd number of moves left is a win for
+# the player whose turn it is and an even number is a loss
+MAX_PLIES = 254
+
+# piece types by their lowercase symbol
+SYMBOL_TYPES = {piece_type.get_symbol(False): piece_type for piece_type in PIECE_TYPES}
+
+
+def parse_signature(signature):
+    """
+    reads a material signature, which is blue's pieces in upper case, a dash and red's pieces in
+    lower case, each side with exactly one general written as k, e.g. 'KR-kgg'
+    :param signature: the signature string, the pieces can be in any order
+    :return: tuple of (PieceType, player) tuples, blue's pieces first and each side sorted by
+             piece type code with the general first
+    """
+    sides = signature.split('-')
+    if len(sides) != 2 or not sides[0].isupper() or not sides[1].islower():
+        raise ValueError('signature %r is not written as BLUE-red, e.g. KR-kgg' % signature)
+
+    pieces = []
+    for player, symbols in (True, sides[0]), (False, sides[1]):
+        types = []
+        for symbol in symbols.lower():
+            if symbol not in SYMBOL_TYPES:
+                raise ValueError('unknown piece %r in signature %r' % (symbol, signature))
+            types.append(SYMBOL_TYPES[symbol])
+        if types.count(GENERAL) != 1:
+            raise ValueError('each side needs exactly one general in signature %r' % signature)
+        pieces += [(piece_type, player) for piece_type in sorted(types, key=PieceType.get_code)]
+    return tuple(pieces)
+
+
+def format_signature(pieces):
+    """
+    writes the material signature of pieces
+    :param pieces: iterable of (PieceType, player) tuples
+    :return: the signature string in the order used by parse_signature
+    """
+    sides = []
+    for side in True, False:
+        types = sorted((piece_type for piece_type, player in pieces if player == side),
+                       key=PieceType.get_code)
+        sides.append(''.join(piece_type.get_symbol(side) for piece_type in types))
+    return '-'.join(sides)
+
+
+def piece_squares(piece_type, player):
+    """
+    finds the squares a piece can stand on
+    :param piece_type: the PieceType of the piece
+    :param player: True for blue, False for red
+    :return: tuple of square indices, the player's palace for pieces confined to it and the whole
+             board otherwise
+    """
+    if piece_type.get_legal_moves(player)[2]:
+        if player:
+            return BLUE_PALACE
+        return RED_PALACE
+    return tuple(range(90))
+
+
+def sub_signatures(signature):
+    """
+    finds the signatures reached by capturing one piece
+    :param signature: the signature string
+    :return: set of signature strings
+    """
+    pieces = parse_signature(signature)
+    result = set()
+    for i, (piece_type, player) in enumerate(pieces):
+        if piece_type is not GENERAL:
+            result.add(format_signature(pieces[:i] + pieces[i + 1:]))
+    return result
+
+
+class Indexer:
+    """
+    Indexer class numbers every position of a material signature - each piece has a digit for its
+    place in the list of squares it can stand on, and the turn is the lowest digit
+    """
+
+    def __init__(self, signature):
+        """
+        init method creates the square lists of each piece
+        :param signature: the signature string
+        """
+        self._pieces = parse_signature(signature)
+        self._squares = tuple(piece_squares(piece_type, player)
+                              for piece_type, player in self._pieces)
+        self._places = tuple({square: place for place, square in enumerate(squares)}
+                             for squares in self._squares)
+        self._size = 2
+        for squares in self._squares:
+            self._size *= len(squares)
+
+
+    def get_pieces(self):
+        """returns the tuple of (PieceType, player) pieces in index order"""
+        return self._pieces
+
+
+    def get_size(self):
+        """returns the number of positions, including impossible ones"""
+        return self._size
+
+
+    def index(self, squares, turn):
+        """
+        numbers a position
+        :param squares: list with the square index of each piece, in index order
+        :param turn: True if it is blue's turn
+        :return: the position number
+        """
+        number = 0
+        for places, square in zip(self._places, squares):
+            number = number * len(places) + places[square]
+        return number * 2 + turn
+
+
+    def squares(self, number):
+        """
+        finds the position of a number
+        :param number: the position number
+        :return: tuple containing the list with the square index of each piece, in index order,
+                 and True if it is blue's turn
+        """
+        turn = bool(number & 1)
+        number >>= 1
+        squares = []
+        for allowed in reversed(self._squares):
+            number, place = divmod(number, len(allowed))
+            squares.append(allowed[place])
+        squares.reverse()
+        return squares, turn
+
+
+def tablebase_path(directory, signature):
+    """returns the name of the file of a signature in a directory"""
+    return os.path.join(directory, signature + TABLEBASE_EXTENSION)
+
+
+def load_table(directory, signature):
+    """
+    reads the file of a signature
+    :param directory: directory of the tablebase files
+    :param signature: the signature string
+    :return: bytes object with a byte for each position
+    """
+    with open(tablebase_path(directory, signature), 'rb') as file:
+        table = file.read()
+    if len(table) != Indexer(signature).get_size():
+        raise ValueError('%s is not a tablebase of %s' % (file.name, signature))
+    return table
+
+
+def solve_signature(signature, directory):
+    """
+    solves every position of a signature and writes its file - the files of every signature in
+    sub_signatures must already be there
+    :param signature: the signature string
+    :param directory: directory of the tablebase files
+    :return: tuple containing the signature, the numbers of positions won, lost and drawn by the
+             player whose turn it is, and the seconds taken
+    """
+    start = time.perf_counter()
+    indexer = Indexer(signature)
+    pieces = indexer.get_pieces()
+    codes = [piece_type.get_code() + 1 + 8 * player for piece_type, player in pieces]
+    size = indexer.get_size()
+
+    # indexers and tables of the signatures reached by capturing each piece
+    captures = []
+    for i, (piece_type, player) in enumerate(pieces):
+        if piece_type is GENERAL:
+            captures.append(None)
+        else:
+            sub_signature = format_signature(pieces[:i] + pieces[i + 1:])
+            captures.append((Indexer(sub_signature), load_table(directory, sub_signature)))
+
+    # the moves of every position leading to other positions of this signature, as a flat array
+    # with the first move of each position in offsets - the moves that capture are counted
+    # straight away, since their results are already known
+    offsets = array('q', [0])
+    moves = array('q')
+    # plies found so far for each position, -1 while unknown
+    plies = array('h', [-1]) * size
+    # number of moves not yet known to win for the other player, the most plies among those that
+    # are, and whether any move reaches a draw so the position cannot be lost
+    remaining = array('h', [0]) * size
+    longest = array('h', [0]) * size
+    can_lose = bytearray(b'\x01') * size
+    # positions found to be decided at each number of plies
+    levels = [[] for ply in range(MAX_PLIES + 2)]
+
+    game = JanggiGame([])
+    data = bytearray(POSITION_SIZE)
+    data[0] = POSITION_FORMAT
+    for number in range(size):
+        squares, turn = indexer.squares(number)
+        offsets.append(offsets[-1])
+        if len(set(squares)) != len(squares):
+            continue
+
+        for square in range(90):
+            data[2 + square] = 0
+        for square, code in zip(squares, codes):
+            data[2 + square] = code
+        data[1] = turn
+        game.load_bytes(bytes(data))
+
+        # the player who just moved cannot have left the general in check
+        if game.is_in_check(game.player(not turn)):
+            continue
+
+        slots = {square: i for i, square in enumerate(squares)}
+        legal = 0
+        win = None
+        for square_from, square_to in game.iter_legal_squares(turn):
+            legal += 1
+            next_squares = list(squares)
+            next_squares[slots[square_from]] = square_to
+            captured = slots.get(square_to) if square_from != square_to else None
+            if captured is None:
+                moves.append(indexer.index(next_squares, not turn))
+                continue
+
+            # the result of a capture comes from the smaller signature, where it is the other
+            # player's turn
+            sub_indexer, table = captures[captured]
+            del next_squares[captured]
+            value = table[sub_indexer.index(next_squares, not turn)]
+            if value == 0:
+                can_lose[number] = False
+            elif value % 2 == 1:
+                # the other player loses in value - 1 plies, so this is a win in value plies
+                if win is None or value < win:
+                    win = value
+            else:
+                longest[number] = max(longest[number], value - 1)
+
+        offsets[-1] = len(moves)
+        remaining[number] = offsets[-1] - offsets[number]
+
+        # no legal moves is checkmate, since passing is legal whenever not in check
+        if legal == 0:
+            levels[0].append(number)
+        elif win is not None:
+            levels[win].append(number)
+        elif remaining[number] == 0 and can_lose[number]:
+            levels[longest[number] + 1].append(number)
+
+    # the moves into each position, found by reversing the moves out of each position
+    counts = array('q', [0]) * (size + 1)
+    for target in moves:
+        counts[target + 1] += 1
+    for number in range(size):
+        counts[number + 1] += counts[number]
+    sources = array('q', [0]) * len(moves)
+    filled = array('q', counts)
+    for number in range(size):
+        for i in range(offsets[number], offsets[number + 1]):
+            target = moves[i]
+            sources[filled[target]] = number
+            filled[target] += 1
+    del moves, filled
+
+    # spread the results backwards - a position that loses makes every position moving into it a
+    # win, and a position that wins makes a position moving into it a loss once all of that
+    # position's moves are known to win for the other player
+    for ply in range(MAX_PLIES + 1):
+        for number in levels[ply]:
+            if plies[number] != -1:
+                continue
+            plies[number] = ply
+            for i in range(counts[number], counts[number + 1]):
+                source = sources[i]
+                if plies[source] != -1:
+                    continue
+                if ply % 2 == 0:
+                    levels[ply + 1].append(source)
+                else:
+                    remaining[source] -= 1
+                    longest[source] = max(longest[source], ply)
+                    if remaining[source] == 0 and can_lose[source]:
+                        levels[longest[source] + 1].append(source)
+        levels[ply] = None
+    if levels[MAX_PLIES + 1]:
+        raise ValueError('%s has checkmates longer than %d plies' % (signature, MAX_PLIES))
+
+    table = bytes(ply + 1 if ply != -1 else 0 for ply in plies)
+    path = tablebase_path(directory, signature)
+    with open(path + '.tmp', 'wb') as file:
+        file.write(table)
+    os.replace(path + '.tmp', path)
+
+    wins = sum(1 for ply in plies if ply != -1 and ply % 2 == 1)
+    losses = sum(1 for ply in plies if ply != -1 and ply % 2 == 0)
+    return signature, wins, losses, size - wins - losses, time.perf_counter() - start
+
+
+def required_signatures(signatures):
+    """
+    finds every signature needed to solve some signatures, which is them and every signature
+    reached from them by captures
+    :param signatures: iterable of signature strings
+    :return: list of lists of signature strings, grouped by the number of pieces from the fewest,
+             so each group only needs the groups before it
+    """
+    needed = set()
+    waiting = [format_signature(parse_signature(signature)) for signature in signatures]
+    while waiting:
+        signature = waiting.pop()
+        if signature not in needed:
+            needed.add(signature)
+            waiting.extend(sub_signatures(signature))
+
+    groups = {}
+    for signature in needed:
+        groups.setdefault(len(signature) - 1, []).append(signature)
+    return [sorted(groups[count]) for count in sorted(groups)]
+
+
+def generate(signatures, directory, workers=None, progress=None):
+    """
+    solves signatures and the ones they need, skipping any whose file is already there - the
+    signatures with the same number of pieces are solved across worker processes
+    :param signatures: iterable of signature strings
+    :param directory: directory to write the tablebase files to
+    :param workers: optional, number of worker processes, defaults to the number of processors -
+                    1 solves every signature in this process
+    :param progress: optional, a file such as sys.stderr to print each solved signature to
+    :return: list of the tuples returned by solve_signature for the signatures solved
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+
+    results = []
+    for group in required_signatures(signatures):
+        group = [signature for signature in group
+                 if not os.path.exists(tablebase_path(directory, signature))]
+        if workers == 1 or len(group) <= 1:
+            solved = [solve_signature(signature, directory) for signature in group]
+        else:
+            with ProcessPoolExecutor(min(workers, len(group))) as pool:
+                solved = list(pool.map(solve_signature, group, [directory] * len(group)))
+        for result in solved:
+            results.append(result)
+            if progress is not None:
+                print('%-10s won %9d  lost %9d  drawn %9d  %8.2f seconds' % result,
+                      file=progress)
+    return results
+
+
+class Tablebase:
+    """
+    Tablebase class probes positions in the tablebase files of a directory, reading the file of
+    each signature the first time it is needed
+    """
+
+    def __init__(self, directory):
+        """
+        init method sets up the table cache
+        :param directory: directory of the tablebase files
+        """
+        self._directory = directory
+        # indexer and table of each signature, or None if there is no file for it
+        self._tables = {}
+
+
+    def get_table(self, signature):
+        """
+        finds the indexer and table of a signature
+        :param signature: the signature string
+        :return: tuple containing the Indexer and the bytes of the table, or None if the signature
+                 has no file
+        """
+        if signature not in self._tables:
+            entry = None
+            if os.path.exists(tablebase_path(self._directory, signature)):
+                entry = Indexer(signature), load_table(self._directory, signature)
+            self._tables[signature] = entry
+        return self._tables[signature]
+
+
+    def probe(self, game):
+        """
+        looks up the current position of a game
+        :param game: the JanggiGame to look up
+        :return: tuple containing WIN, LOSS or DRAW for the player whose turn it is and the number
+                 of moves left until checkmate counting both players, None for a draw, or None if
+                 the signature of the position has no file or a piece is off its squares
+        """
+        pieces = [piece for player in (True, False) for piece in game.get_pieces(player)]
+        signature = format_signature([(piece.get_type(), piece.get_player()) for piece in pieces])
+        entry = self.get_table(signature)
+        if entry is None:
+            return None
+        indexer, table = entry
+
+        # pieces of the same kind are taken in the order of the indexer
+        squares = {}
+        for piece in pieces:
+            squares.setdefault((piece.get_type(), piece.get_player()), []).append(
+                piece.get_square())
+        ordered = [squares[piece].pop() for piece in indexer.get_pieces()]
+
+        # a general or guard outside its palace cannot be in the table
+        try:
+            value = table[indexer.index(ordered, game.get_turn())]
+        except KeyError:
+            return None
+        if value == 0:
+            return DRAW, None
+        if value % 2 == 0:
+            return WIN, value - 1
+        return LOSS, value - 1
+
+
+def main():
+    """
+    solves signatures from the command line as 'tablebase.py generate DIRECTORY SIGNATURE...', or
+    probes positions given in JanggiGame.to_fen form as 'tablebase.py probe DIRECTORY FEN...'
+    """
+    if len(sys.argv) < 4 or sys.argv[1] not in ('generate', 'probe'):
+        print('usage: tablebase.py generate DIRECTORY SIGNATURE... | '
+              'tablebase.py probe DIRECTORY FEN...')
+        sys.exit(2)
+
+    if sys.argv[1] == 'generate':
+        start = time.perf_counter()
+        results = generate(sys.argv[3:], sys.argv[2], progress=sys.stdout)
+        print('%d signatures solved in %.2f seconds' % (len(results), time.perf_counter() - start))
+        return
+
+    tablebase = Tablebase(sys.argv[2])
+    names = {WIN: 'win', DRAW: 'draw', LOSS: 'loss'}
+    for text in sys.argv[3:]:
+        result = tablebase.probe(JanggiGame.from_fen(text))
+        if result is None:
+            print('%s: not in the tablebase' % text)
+        elif result[0] == DRAW:
+            print('%s: draw' % text)
+        else:
+            print('%s: %s, checkmate in %d plies' % (text, names[result[0]], result[1]))
+
+
+if __name__ == '__main__':
+    main()